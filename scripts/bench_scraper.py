@@ -0,0 +1,237 @@
+import argparse
+import gzip
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import page_parser
+from crawl_metrics import peak_rss_mb
+from page_parser import parse_company_details, parse_company_links
+from synthetic_pages import company_page, listing_companies, listing_page, synthetic_company
+
+DEFAULT_DETAIL_PAGES = 2000
+DEFAULT_LISTING_PAGES = 20
+DEFAULT_ROWS = 12000
+DEFAULT_RESULTS_PATH = 'bench_results.jsonl'
+
+
+class InMemoryClient:
+    """Stand-in for the Supabase client covering the calls CompanyWriter makes.
+
+    `latency` seconds are slept per request to mimic a network round trip.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.rows: Dict[str, Dict] = {}
+        self.requests = 0
+
+    def table(self, name: str) -> '_Query':
+        return _Query(self)
+
+
+class _Query:
+    def __init__(self, client: InMemoryClient):
+        self.client = client
+        self.action: Optional[Tuple] = None
+
+    def select(self, *columns, **kwargs):
+        self.action = ('select', None)
+        return self
+
+    def in_(self, column: str, values: List[str]):
+        self.action = ('select', values)
+        return self
+
+    def upsert(self, rows: List[Dict], on_conflict: str = '', ignore_duplicates: bool = False, **kwargs):
+        self.action = ('upsert', rows, ignore_duplicates)
+        return self
+
+    def execute(self):
+        client = self.client
+        client.requests += 1
+        if client.latency:
+            time.sleep(client.latency)
+        data = []
+        if self.action[0] == 'select':
+            names = self.action[1] or list(client.rows)
+            data = [{'name': name} for name in names if name in client.rows]
+        elif self.action[0] == 'upsert':
+            _, rows, ignore_duplicates = self.action
+            for row in rows:
+                if ignore_duplicates and row['name'] in client.rows:
+                    continue
+                client.rows[row['name']] = row
+                data.append(row)
+        return type('Result', (), {'data': data, 'count': len(data)})()
+
+
+def load_corpus(directory: str) -> Tuple[List[bytes], List[bytes]]:
+    """Read (listing_pages, detail_pages) from a page cache directory"""
+    listings, details = [], []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                url = json.load(f).get('url', '')
+            body_path = os.path.join(root, name[:-len('.json')] + '.html.gz')
+            if not os.path.exists(body_path):
+                continue
+            with gzip.open(body_path, 'rb') as f:
+                content = f.read()
+            (details if '/company/' in url else listings).append(content)
+    return listings, details
+
+
+def synthetic_corpus(listing_pages: int, detail_pages: int) -> Tuple[List[bytes], List[bytes]]:
+    total = max(detail_pages, listing_pages * 100)
+    listings = [
+        listing_page(listing_companies(page, 100, total), total, page).encode('utf-8')
+        for page in range(1, listing_pages + 1)
+    ]
+    details = [company_page(synthetic_company(index)).encode('utf-8') for index in range(detail_pages)]
+    return listings, details
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name: str, items: int, elapsed: float, latencies: Optional[List[float]] = None) -> Dict:
+    result = {
+        'benchmark': name,
+        'items': items,
+        'seconds': round(elapsed, 4),
+        'items_per_second': round(items / elapsed, 2) if elapsed else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    if latencies:
+        result['p50_ms'] = round(percentile(latencies, 0.5) * 1000, 3)
+        result['p99_ms'] = round(percentile(latencies, 0.99) * 1000, 3)
+        result['mean_ms'] = round(statistics.fmean(latencies) * 1000, 3)
+    return result
+
+
+def bench_serial(name: str, fn: Callable, pages: List[bytes]) -> Dict:
+    latencies = []
+    start = time.perf_counter()
+    for content in pages:
+        page_start = time.perf_counter()
+        fn(content)
+        latencies.append(time.perf_counter() - page_start)
+    return summarize(name, len(pages), time.perf_counter() - start, latencies)
+
+
+def bench_pool(name: str, fn: Callable, pages: List[bytes], workers: int) -> Dict:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Warm the workers up so process start-up is not measured
+        list(pool.map(fn, pages[:workers]))
+        start = time.perf_counter()
+        for _ in pool.map(fn, pages, chunksize=8):
+            pass
+        elapsed = time.perf_counter() - start
+    result = summarize(name, len(pages), elapsed)
+    result['workers'] = workers
+    return result
+
+
+def bench_save(rows: int, batch_size: int, latency: float) -> Dict:
+    from company_writer import CompanyWriter
+
+    client = InMemoryClient(latency)
+    records = [
+        {'name': company['name'], 'source_url': f"{page_parser.BASE_URL}/2026/company/{company['id']}/",
+         'description': f"業種: {company['industry']}{company['sub_industry']}", 'location': company['location']}
+        for company in map(synthetic_company, range(rows))
+    ]
+    start = time.perf_counter()
+    with CompanyWriter(client=client, batch_size=batch_size) as writer:
+        writer.extend(records)
+    result = summarize('save', rows, time.perf_counter() - start)
+    result.update({'batch_size': batch_size, 'db_latency_ms': latency * 1000, 'requests': client.requests})
+    return result
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(__file__) or '.').stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Rikunabi scraper hot paths")
+    parser.add_argument('--corpus', default=None,
+                        help="Page cache directory to replay instead of synthetic pages")
+    parser.add_argument('--detail-pages', type=int, default=DEFAULT_DETAIL_PAGES,
+                        help="Synthetic company pages to parse")
+    parser.add_argument('--listing-pages', type=int, default=DEFAULT_LISTING_PAGES,
+                        help="Synthetic listing pages to parse")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes for the parser pool benchmark")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS,
+                        help="Rows pushed through the save path")
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help="Upsert batch size for the save benchmark")
+    parser.add_argument('--db-latency', type=float, default=0.05,
+                        help="Simulated seconds per database round trip")
+    parser.add_argument('--only', action='append', choices=['listing', 'detail', 'pool', 'save'],
+                        help="Run only the selected benchmarks (repeatable)")
+    parser.add_argument('--output', default=DEFAULT_RESULTS_PATH,
+                        help="JSONL file the results are appended to")
+    args = parser.parse_args()
+    selected = set(args.only or ['listing', 'detail', 'pool', 'save'])
+
+    results = []
+    # peak_rss_mb is the process high-water mark, so the save benchmark runs
+    # before any corpus is built and only the corpora a benchmark needs are
+    # generated; pages nobody parses would otherwise inflate every result
+    if 'save' in selected:
+        results.append(bench_save(args.rows, args.batch_size, args.db_latency))
+
+    need_listings = 'listing' in selected
+    need_details = bool(selected & {'detail', 'pool'})
+    listings: List[bytes] = []
+    details: List[bytes] = []
+    if args.corpus and (need_listings or need_details):
+        listings, details = load_corpus(args.corpus)
+    elif need_listings or need_details:
+        listings, details = synthetic_corpus(args.listing_pages if need_listings else 0,
+                                             args.detail_pages if need_details else 0)
+    if need_listings or need_details:
+        print(f"Corpus: {len(listings)} listing pages, {len(details)} detail pages")
+
+    if need_listings and listings:
+        results.append(bench_serial('parse_company_links', parse_company_links, listings))
+    if 'detail' in selected and details:
+        results.append(bench_serial('parse_detail', parse_company_details, details))
+    if 'pool' in selected and details:
+        results.append(bench_pool('parse_detail_pool', parse_company_details, details, args.workers))
+
+    run = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'parser_backend': page_parser.PARSER_BACKEND,
+        'corpus': args.corpus or 'synthetic',
+        'results': results,
+    }
+    with open(args.output, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run, ensure_ascii=False) + '\n')
+
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    print(f"Appended results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
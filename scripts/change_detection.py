@@ -0,0 +1,95 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+from known_companies import fetch_all_rows
+
+# Fields the scraper owns; columns filled by other jobs (industry_text,
+# industry_id) are left out so they do not make every row look changed
+HASHED_FIELDS = ('name', 'source_url', 'description', 'location')
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(value) -> str:
+    """Canonical form of a field for hashing: NFKC (full/half width folded), collapsed spaces"""
+    if value is None:
+        return ''
+    return WHITESPACE.sub(' ', unicodedata.normalize('NFKC', str(value))).strip()
+
+
+def content_hash(record: Dict) -> str:
+    payload = json.dumps([normalize(record.get(field)) for field in HASHED_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+class ChangeDetector:
+    """Diff stage that drops scraped rows whose content matches what is stored.
+
+    `stored` maps company name to its stored row. Rows stored before the
+    content_hash column existed are hashed from their fields, so the first
+    run after the migration already skips unchanged companies. Every new or
+    changed row is appended to the change log (JSONL, one file per run) with
+    the fields that differ.
+    """
+
+    def __init__(self, stored: Dict[str, Dict], log_path: Optional[str] = None):
+        self.hashes = {name: row.get('content_hash') or content_hash(row) for name, row in stored.items()}
+        self.stored = stored
+        self.log_path = log_path
+        self.log = open(log_path, 'a', encoding='utf-8') if log_path else None
+        self.stats = {'new': 0, 'changed': 0, 'unchanged': 0}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def diff(self, rows: Iterable[Dict]) -> List[Dict]:
+        """Return the rows to write, each with its content_hash set"""
+        changed_rows = []
+        entries = []
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        with self.lock:
+            for row in rows:
+                digest = content_hash(row)
+                previous = self.hashes.get(row['name'])
+                if previous == digest:
+                    self.stats['unchanged'] += 1
+                    continue
+                old = self.stored.get(row['name'])
+                if old is None:
+                    self.stats['new'] += 1
+                    entries.append({'at': now, 'change': 'new', 'name': row['name'],
+                                    'source_url': row.get('source_url')})
+                else:
+                    self.stats['changed'] += 1
+                    fields = {field: [old.get(field), row.get(field)] for field in HASHED_FIELDS
+                              if normalize(old.get(field)) != normalize(row.get(field))}
+                    entries.append({'at': now, 'change': 'changed', 'name': row['name'],
+                                    'source_url': row.get('source_url'), 'fields': fields})
+                # Later duplicates within this run compare against what is being written
+                self.hashes[row['name']] = digest
+                self.stored[row['name']] = row
+                changed_rows.append({**row, 'content_hash': digest})
+            if self.log and entries:
+                self.log.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+                self.log.flush()
+        return changed_rows
+
+    def close(self):
+        if self.log and not self.log.closed:
+            self.log.close()
+        print(f"Change detection: {self.stats['new']} new, {self.stats['changed']} changed, "
+              f"{self.stats['unchanged']} unchanged"
+              + (f"; change log in {self.log_path}" if self.log_path else ''))
+
+
+def load_change_detector(client=None, log_path: Optional[str] = None,
+                         table: str = 'companies') -> ChangeDetector:
+    """Preload the hashed fields of every stored company"""
+    rows = fetch_all_rows(', '.join(HASHED_FIELDS + ('content_hash',)), client, table)
+    return ChangeDetector({row['name']: row for row in rows if row.get('name')}, log_path)
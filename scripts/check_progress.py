@@ -1,50 +1,112 @@
+import argparse
 import sys
 import os
+import time
+from typing import Dict, Optional
 
 # Add parent directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from supabase_client import supabase
+from crawl_journal import load_listing_total
+from supabase_client import get_supabase
 
-def check_progress():
+# Used when no listing count is known
+FALLBACK_TARGET = 11976
+
+def fetch_counts() -> Dict[str, int]:
+    """Fetch progress counters without transferring any company rows"""
+    supabase = get_supabase()
+    try:
+        # One round trip via the aggregate function from migration 006
+        result = supabase.rpc('company_progress').execute()
+        if result.data:
+            return result.data[0]
+    except Exception as e:
+        print(f"company_progress() unavailable, using count queries: {e}")
+
+    def companies():
+        return supabase.table('companies').select('id', count='exact', head=True)
+
+    def count(query) -> int:
+        return query.execute().count or 0
+
+    return {
+        'total': count(companies()),
+        'with_industry': count(companies().not_.is_('description', None)),
+        'with_location': count(companies().not_.is_('location', None)),
+        'with_industry_text': count(companies().not_.is_('industry_text', None)),
+    }
+
+def fetch_target() -> Optional[int]:
+    """Read the number of companies currently listed on Rikunabi"""
+    from http_client import fetch_content
+    from page_parser import LISTING_URL, parse_result_count
+
+    try:
+        return parse_result_count(fetch_content(LISTING_URL))
+    except Exception as e:
+        print(f"Could not read live listing count: {e}")
+        return None
+
+def print_samples():
+    print("\n=== Sample Companies ===")
+    sample_result = get_supabase().table('companies').select('name, description, location').limit(10).execute()
+    for company in sample_result.data:
+        print(f"- {company['name']}")
+        if company.get('description'):
+            print(f"  Description: {company['description']}")
+        if company.get('location'):
+            print(f"  Location: {company['location']}")
+        print()
+
+def check_progress(target: int, samples: bool = True):
     """Check the current progress of company scraping"""
-    
+
     try:
-        # Get total count of companies
-        result = supabase.table('companies').select('*', count='exact').execute()
-        total_companies = len(result.data)
-        
+        counts = fetch_counts()
+        total_companies = counts['total']
+
         print(f"Total companies in database: {total_companies}")
-        
-        # Get companies with industry data (stored in description)
-        result_with_industry = supabase.table('companies').select('*').not_.is_('description', None).execute()
-        companies_with_industry = len(result_with_industry.data)
-        
-        print(f"Companies with industry data: {companies_with_industry}")
-        
-        # Get companies with location data
-        result_with_location = supabase.table('companies').select('*').not_.is_('location', None).execute()
-        companies_with_location = len(result_with_location.data)
-        
-        print(f"Companies with location data: {companies_with_location}")
-        
-        # Show some sample data
-        print("\n=== Sample Companies ===")
-        sample_result = supabase.table('companies').select('name, description, location').limit(10).execute()
-        for company in sample_result.data:
-            print(f"- {company['name']}")
-            if company.get('description'):
-                print(f"  Description: {company['description']}")
-            if company.get('location'):
-                print(f"  Location: {company['location']}")
-            print()
-        
+        print(f"Companies with industry data: {counts['with_industry']}")
+        print(f"Companies with location data: {counts['with_location']}")
+        print(f"Companies with industry_text: {counts['with_industry_text']}")
+
+        if samples:
+            print_samples()
+
         # Calculate progress percentage
-        progress = (total_companies / 11976) * 100
-        print(f"Progress: {progress:.1f}% ({total_companies}/11,976)")
-        
+        progress = (total_companies / target) * 100 if target else 0
+        print(f"Progress: {progress:.1f}% ({total_companies}/{target:,})")
+
     except Exception as e:
         print(f"Error checking progress: {e}")
 
+def main():
+    parser = argparse.ArgumentParser(description="Report company scraping progress")
+    parser.add_argument('--watch', type=float, default=None, metavar='SECONDS',
+                        help="Repeat the report every SECONDS until interrupted")
+    parser.add_argument('--target', type=int, default=None,
+                        help="Expected number of companies (default: the count the last crawl read)")
+    parser.add_argument('--live-target', action='store_true',
+                        help="Read the count from the live listing page instead (loads the parser)")
+    parser.add_argument('--no-samples', action='store_true',
+                        help="Skip printing sample companies")
+    args = parser.parse_args()
+
+    target = (args.target or (fetch_target() if args.live_target else None)
+              or load_listing_total() or FALLBACK_TARGET)
+
+    if args.watch is None:
+        check_progress(target, samples=not args.no_samples)
+        return
+
+    try:
+        while True:
+            print(f"\n=== {time.strftime('%H:%M:%S')} ===")
+            check_progress(target, samples=False)
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
+
 if __name__ == "__main__":
-    check_progress()
\ No newline at end of file
+    main()
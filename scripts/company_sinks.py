@@ -0,0 +1,283 @@
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from crawl_metrics import metrics
+
+# Columns of the companies table filled by the scraper, in file order
+COLUMNS = ('name', 'source_url', 'description', 'location', 'industry_text')
+DEFAULT_FILE_BATCH_SIZE = 1000
+
+
+class BufferedSink:
+    """Base class for destinations of scraped company records.
+
+    Records are buffered and handed to `_write` in batches of `batch_size`,
+    so memory stays bounded however long the crawl runs. Use as a context
+    manager so the last partial batch is always flushed. `on_write` is called
+    with each batch once it has been written.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_FILE_BATCH_SIZE,
+                 on_write: Optional[Callable[[List[Dict]], None]] = None):
+        self.batch_size = batch_size
+        self.on_write = on_write
+        self.buffer: List[Dict] = []
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def add(self, company: Dict):
+        """Queue one company, flushing when the batch is full"""
+        with self.lock:
+            self.buffer.append(company)
+            if len(self.buffer) < self.batch_size:
+                return
+            batch, self.buffer = self.buffer, []
+        self._write(batch)
+
+    def extend(self, companies: Iterable[Dict]):
+        for company in companies:
+            self.add(company)
+
+    def flush(self):
+        """Write whatever is currently buffered"""
+        with self.lock:
+            batch, self.buffer = self.buffer, []
+        if batch:
+            self._write(batch)
+
+    def close(self):
+        self.flush()
+
+    def _write(self, batch: List[Dict]):
+        raise NotImplementedError
+
+
+class JsonlSink(BufferedSink):
+    """Append records to a JSON Lines file, one object per line.
+
+    The file is only ever appended to and each batch is flushed to the OS
+    before `on_write` runs, so an interrupted crawl leaves a valid prefix
+    that the next run keeps extending.
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_FILE_BATCH_SIZE,
+                 on_write: Optional[Callable[[List[Dict]], None]] = None):
+        super().__init__(batch_size, on_write)
+        self.path = path
+        self.rows = 0
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def _write(self, batch: List[Dict]):
+        lines = ''.join(json.dumps(company, ensure_ascii=False) + '\n' for company in batch)
+        with self.write_lock, metrics.timer('sink_write_seconds', sink='jsonl'):
+            self.file.write(lines)
+            self.file.flush()
+        self.rows += len(batch)
+        metrics.inc('rows_written_total', len(batch), result='exported')
+        if self.on_write:
+            self.on_write(batch)
+
+    def close(self):
+        super().close()
+        if not self.file.closed:
+            os.fsync(self.file.fileno())
+            self.file.close()
+            print(f"Wrote {self.rows} companies to {self.path}")
+
+
+class ParquetSink(BufferedSink):
+    """Write records to a Parquet file, one row group per batch.
+
+    Requires pyarrow. Parquet files cannot be appended to, so each run
+    replaces `path`; the file is only readable once the sink is closed.
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_FILE_BATCH_SIZE,
+                 on_write: Optional[Callable[[List[Dict]], None]] = None):
+        super().__init__(batch_size, on_write)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from None
+        self.pa = pa
+        self.path = path
+        self.rows = 0
+        self.schema = pa.schema([(column, pa.string()) for column in COLUMNS])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def _write(self, batch: List[Dict]):
+        columns = {column: [company.get(column) for company in batch] for column in COLUMNS}
+        table = self.pa.Table.from_pydict(columns, schema=self.schema)
+        with self.write_lock, metrics.timer('sink_write_seconds', sink='parquet'):
+            self.writer.write_table(table)
+        self.rows += len(batch)
+        metrics.inc('rows_written_total', len(batch), result='exported')
+        if self.on_write:
+            self.on_write(batch)
+
+    def close(self):
+        super().close()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            print(f"Wrote {self.rows} companies to {self.path}")
+
+
+class MultiSink:
+    """Fan records out to several sinks, e.g. Supabase plus a JSONL archive.
+
+    `on_write` replaces the sinks' own callbacks and is called with records
+    only once every sink has written them, so a record still buffered by a
+    JSONL sink never counts as saved because the database already has it.
+    """
+
+    def __init__(self, sinks: List[BufferedSink],
+                 on_write: Optional[Callable[[List[Dict]], None]] = None):
+        self.sinks = sinks
+        self.on_write = on_write
+        self.lock = threading.Lock()
+        # id(record) -> [record, writes still outstanding]
+        self.pending: Dict[int, list] = {}
+        for sink in sinks:
+            sink.on_write = self._written if on_write and len(sinks) > 1 else on_write
+
+    @property
+    def buffer(self) -> List[Dict]:
+        return [company for sink in self.sinks for company in sink.buffer]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def add(self, company: Dict):
+        if self.on_write and len(self.sinks) > 1:
+            with self.lock:
+                self.pending.setdefault(id(company), [company, 0])[1] += len(self.sinks)
+        for sink in self.sinks:
+            sink.add(company)
+
+    def extend(self, companies: Iterable[Dict]):
+        for company in companies:
+            self.add(company)
+
+    def _written(self, batch: List[Dict]):
+        # Records of a failed batch are never reported, so they stay pending
+        done = []
+        with self.lock:
+            for company in batch:
+                entry = self.pending.get(id(company))
+                if entry is None:
+                    continue
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.pending[id(company)]
+                    done.append(company)
+        if done:
+            self.on_write(done)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def file_format(path: str) -> str:
+    return 'parquet' if path.endswith(('.parquet', '.pq')) else 'jsonl'
+
+
+def open_file_sink(path: str, batch_size: int = DEFAULT_FILE_BATCH_SIZE,
+                   on_write: Optional[Callable[[List[Dict]], None]] = None) -> BufferedSink:
+    """JSONL or Parquet sink chosen from the file extension"""
+    sink_class = ParquetSink if file_format(path) == 'parquet' else JsonlSink
+    return sink_class(path, batch_size, on_write)
+
+
+def iter_record_batches(path: str, batch_size: int = DEFAULT_FILE_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """Stream records from a JSONL or Parquet export in batches"""
+    if file_format(path) == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet exports requires pyarrow (pip install pyarrow)") from None
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield record_batch.to_pylist()
+        return
+
+    batch = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                batch.append(json.loads(line))
+            except ValueError:
+                # A crawl killed mid-write can leave a truncated last line
+                print(f"Skipping malformed line in {path}: {line[:80]}")
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def copy_into_postgres(path: str, dsn: str, update_existing: bool = False,
+                       table: str = 'companies') -> int:
+    """Bulk load an export straight into Postgres with COPY; returns rows inserted or updated.
+
+    Rows are streamed into a temporary staging table and merged into `table`
+    with INSERT ... ON CONFLICT (name), so re-running a load is idempotent.
+    With update_existing, only the columns present in the export overwrite
+    the stored row.
+    Requires psycopg 3 and a direct database connection string.
+    """
+    try:
+        import psycopg
+    except ImportError:
+        raise RuntimeError("COPY loading requires psycopg (pip install 'psycopg[binary]')") from None
+
+    columns = ', '.join(COLUMNS)
+    if update_existing:
+        # Exports never carry industry_text (filled by industry_mapping) and
+        # partial records lack description or location: keep stored values
+        # wherever the export has none
+        updates = ', '.join(f"{column} = COALESCE(EXCLUDED.{column}, {table}.{column})"
+                            for column in COLUMNS if column != 'name')
+        conflict = f"DO UPDATE SET {updates}"
+    else:
+        conflict = "DO NOTHING"
+
+    with psycopg.connect(dsn) as conn, conn.cursor() as cur:
+        # seq numbers rows in file order, so the last record of a name wins
+        cur.execute(f"CREATE TEMP TABLE companies_load (seq BIGINT GENERATED ALWAYS AS IDENTITY, "
+                    f"{', '.join(f'{c} TEXT' for c in COLUMNS)}) ON COMMIT DROP")
+        with cur.copy(f"COPY companies_load ({columns}) FROM STDIN") as copy:
+            for batch in iter_record_batches(path):
+                for company in batch:
+                    copy.write_row(tuple(company.get(column) for column in COLUMNS))
+        # DISTINCT ON keeps one row per name, as ON CONFLICT may not hit a key
+        # twice; an appended export holds several runs, so take the newest
+        cur.execute(
+            f"INSERT INTO public.{table} ({columns}) "
+            f"SELECT DISTINCT ON (name) {columns} FROM companies_load "
+            f"WHERE name IS NOT NULL AND name <> '' ORDER BY name, seq DESC "
+            f"ON CONFLICT (name) {conflict}"
+        )
+        return cur.rowcount
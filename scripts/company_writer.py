@@ -0,0 +1,138 @@
+from typing import Callable, Dict, List, Optional
+
+from change_detection import ChangeDetector
+from company_sinks import BufferedSink
+from crawl_metrics import metrics
+
+DEFAULT_UPSERT_BATCH_SIZE = 500
+# Names per existence lookup; keeps the PostgREST query string well under URL limits
+LOOKUP_CHUNK_SIZE = 100
+
+
+class CompanyWriter(BufferedSink):
+    """Buffer scraped companies and write them to Supabase in bulk upserts.
+
+    Rows are keyed on the UNIQUE(name) constraint of the companies table. By
+    default existing companies are left untouched (matching the original
+    skip-if-exists behaviour); with update_existing=True they are overwritten.
+    Use as a context manager so the last partial batch is always flushed.
+    `on_write` is called with each batch once it has been written.
+
+    With a change `detector`, rows whose content hash matches the stored row
+    are not sent at all, and new or changed rows are upserted with their
+    content_hash; existing rows are then always overwritten.
+    """
+
+    def __init__(self, client=None, batch_size: int = DEFAULT_UPSERT_BATCH_SIZE,
+                 update_existing: bool = False, table: str = 'companies',
+                 on_write: Optional[Callable[[List[Dict]], None]] = None,
+                 detector: Optional[ChangeDetector] = None):
+        if client is None:
+            # Imported here so benchmarks can pass a stand-in client without Supabase credentials
+            from supabase_client import supabase
+            client = supabase
+        super().__init__(batch_size, on_write)
+        self.client = client
+        self.update_existing = update_existing
+        self.table = table
+        self.detector = detector
+        self.stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'failed': 0}
+
+    def close(self):
+        super().close()
+        print(f"Upsert summary: {self.stats['inserted']} inserted, {self.stats['updated']} updated, "
+              f"{self.stats['unchanged']} unchanged, {self.stats['skipped']} skipped, "
+              f"{self.stats['failed']} failed")
+        if self.detector is not None:
+            self.detector.close()
+
+    def _dedupe(self, batch: List[Dict]) -> List[Dict]:
+        # A single upsert statement may not touch the same conflict key twice,
+        # so keep the last record seen for each name and drop nameless rows.
+        rows: Dict[str, Dict] = {}
+        for company in batch:
+            name = company.get('name')
+            if name:
+                rows[name] = company
+        return list(rows.values())
+
+    def _existing_names(self, names: List[str]) -> set:
+        existing = set()
+        for i in range(0, len(names), LOOKUP_CHUNK_SIZE):
+            chunk = names[i:i + LOOKUP_CHUNK_SIZE]
+            result = self.client.table(self.table).select('name').in_('name', chunk).execute()
+            existing.update(row['name'] for row in result.data)
+        return existing
+
+    def _upsert(self, rows: List[Dict], ignore_duplicates: bool = False) -> List[Dict]:
+        # PostgREST sends the union of the rows' keys as the column list and
+        # fills missing keys with NULL (older clients reject the batch), so a
+        # record without location would wipe the stored one. One request per
+        # key set keeps every upsert to the columns its rows actually carry.
+        groups: Dict[tuple, List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        written = []
+        for group in groups.values():
+            result = self.client.table(self.table).upsert(
+                group, on_conflict='name', ignore_duplicates=ignore_duplicates
+            ).execute()
+            written.extend(result.data or [])
+        return written
+
+    def _write(self, batch: List[Dict]):
+        rows = self._dedupe(batch)
+        skipped = len(batch) - len(rows)
+        unchanged = 0
+        if self.detector is not None and rows:
+            known = sum(1 for row in rows if row['name'] in self.detector.hashes)
+            diffed = self.detector.diff(rows)
+            unchanged = len(rows) - len(diffed)
+            rows = diffed
+
+        if not rows:
+            with self.lock:
+                self.stats['skipped'] += skipped
+                self.stats['unchanged'] += unchanged
+            metrics.inc('rows_written_total', unchanged, result='unchanged')
+            if unchanged and self.on_write:
+                self.on_write(batch)
+            return
+
+        try:
+            with self.write_lock, metrics.timer('db_write_seconds'):
+                if self.detector is not None:
+                    # Only new and changed rows are left, so overwrite unconditionally
+                    self._upsert(rows)
+                    updated = known - unchanged
+                    inserted = len(rows) - updated
+                elif self.update_existing:
+                    existing = self._existing_names([row['name'] for row in rows])
+                    self._upsert(rows)
+                    inserted = len(rows) - len(existing)
+                    updated = len(existing)
+                else:
+                    inserted = len(self._upsert(rows, ignore_duplicates=True))
+                    updated = 0
+                    skipped += len(rows) - inserted
+        except Exception as e:
+            print(f"Error upserting batch of {len(rows)} companies: {e}")
+            with self.lock:
+                self.stats['failed'] += len(rows)
+                self.stats['skipped'] += skipped
+            metrics.inc('rows_written_total', len(rows), result='failed')
+            return
+
+        with self.lock:
+            self.stats['inserted'] += inserted
+            self.stats['updated'] += updated
+            self.stats['unchanged'] += unchanged
+            self.stats['skipped'] += skipped
+        metrics.inc('db_batches_total')
+        metrics.inc('rows_written_total', inserted, result='inserted')
+        metrics.inc('rows_written_total', updated, result='updated')
+        metrics.inc('rows_written_total', unchanged, result='unchanged')
+        metrics.inc('rows_written_total', skipped, result='skipped')
+        print(f"Upserted batch: {inserted} inserted, {updated} updated, {unchanged} unchanged, {skipped} skipped")
+        if self.on_write:
+            self.on_write(batch)
@@ -0,0 +1,248 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_JOURNAL_PATH = 'rikunabi_crawl.db'
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_RETRY_DELAY = 5.0  # seconds, doubled after every failed attempt
+# Rows fetched per query when iterating details, so a resume never loads them all
+ITER_CHUNK_SIZE = 500
+# Listing size read by the last crawl, so progress reports need no page fetch
+DEFAULT_LISTING_TOTAL_PATH = 'rikunabi_listing.json'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page INTEGER PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS details (
+    url TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    page INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    record TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_details_status ON details(status);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS checked (
+    url TEXT PRIMARY KEY,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+
+def journal_path(year: int, default_year: int) -> str:
+    """Default journal file for a graduation year; each year's listing has its own page numbers"""
+    if year == default_year:
+        return DEFAULT_JOURNAL_PATH
+    root, ext = os.path.splitext(DEFAULT_JOURNAL_PATH)
+    return f"{root}_{year}{ext}"
+
+
+def save_listing_total(total: int, page_size: int, year: int, path: str = DEFAULT_LISTING_TOTAL_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'total': total, 'page_size': page_size, 'year': year,
+                   'read_at': time.strftime('%Y-%m-%dT%H:%M:%S')}, f)
+
+
+def load_listing_total(path: str = DEFAULT_LISTING_TOTAL_PATH) -> Optional[int]:
+    """Company count the last crawl read from the listing, or None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('total')
+    except (OSError, ValueError):
+        return None
+
+
+class CrawlJournal:
+    """SQLite journal of crawl progress so an interrupted crawl can resume.
+
+    Listing pages move pending -> done; an empty page within the counted
+    listing is a failure like any other. Detail URLs move pending -> parsed
+    (the scraped record is stored in the journal) -> saved (the record has
+    been written to Supabase), or straight to skipped when an incremental
+    crawl finds the company already up to date. Failures are retried with
+    exponential backoff until max_attempts, after which the entry is marked
+    failed.
+
+    The checked table remembers when each company was last scraped and
+    written (whether or not its content changed) and survives reset(), so
+    --refresh-days can skip companies that change detection left untouched
+    in the database without writing anything there.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 retry_delay: float = DEFAULT_RETRY_DELAY):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _execute(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        with self.lock, self.conn:
+            return self.conn.execute(sql, tuple(params)).fetchall()
+
+    def seed_pages(self, start_page: int, end_page: int):
+        """Register listing pages; pages already in the journal keep their state"""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO pages (page, updated_at) VALUES (?, ?)",
+                [(page, now) for page in range(start_page, end_page + 1)],
+            )
+
+    def reset(self):
+        """Forget all progress so the next crawl starts from scratch"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM pages")
+            self.conn.execute("DELETE FROM details")
+            self.conn.execute("DELETE FROM meta WHERE key = 'year'")
+
+    def claim_year(self, year: int) -> Optional[int]:
+        """Record the graduation year this journal tracks; returns the other year it already tracks, if any"""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'year'").fetchone()
+            if row is None:
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('year', ?)", (str(year),))
+            elif int(row[0]) != year:
+                return int(row[0])
+        return None
+
+    def retry_failed(self):
+        """Give failed pages and details a fresh set of attempts.
+
+        Pages left 'skipped' by journals that ended the listing at an empty
+        page are reopened too.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE pages SET status = 'pending', attempts = 0 "
+                              "WHERE status IN ('failed', 'skipped')")
+            self.conn.execute("UPDATE details SET status = 'pending', attempts = 0 WHERE status = 'failed'")
+
+    def pending_pages(self) -> List[int]:
+        rows = self._execute("SELECT page FROM pages WHERE status = 'pending' ORDER BY page")
+        return [row[0] for row in rows]
+
+    def _iter_details(self, status: str, columns: str) -> Iterator[tuple]:
+        # Keyset pagination over rows that existed when iteration was requested;
+        # details discovered while iterating are left to whoever discovered them
+        last_rowid = self._execute("SELECT COALESCE(MAX(rowid), 0) FROM details")[0][0]
+
+        def rows():
+            after = 0
+            while True:
+                chunk = self._execute(
+                    f"SELECT rowid, {columns} FROM details WHERE status = ? AND rowid > ? AND rowid <= ? "
+                    "ORDER BY rowid LIMIT ?",
+                    (status, after, last_rowid, ITER_CHUNK_SIZE),
+                )
+                for row in chunk:
+                    yield row[1:]
+                if len(chunk) < ITER_CHUNK_SIZE:
+                    return
+                after = chunk[-1][0]
+        return rows()
+
+    def pending_details(self) -> Iterator[Dict]:
+        return ({'name': name, 'source_url': url} for name, url in self._iter_details('pending', 'name, url'))
+
+    def unsaved_records(self) -> Iterator[Dict]:
+        return (json.loads(record) for record, in self._iter_details('parsed', 'record'))
+
+    def count_details(self, status: str) -> int:
+        return self._execute("SELECT COUNT(*) FROM details WHERE status = ?", (status,))[0][0]
+
+    def page_done(self, page: int, companies: List[Dict]) -> List[Dict]:
+        """Mark a listing page done and return the companies not seen on any earlier page"""
+        now = time.time()
+        new_companies = []
+        with self.lock, self.conn:
+            for company in companies:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO details (url, name, page, updated_at) VALUES (?, ?, ?, ?)",
+                    (company['source_url'], company['name'], page, now),
+                )
+                if cursor.rowcount:
+                    new_companies.append(company)
+            self.conn.execute(
+                "UPDATE pages SET status = 'done', error = NULL, updated_at = ? WHERE page = ?",
+                (now, page),
+            )
+        return new_companies
+
+    def details_skipped(self, companies: List[Dict]):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE details SET status = 'skipped', updated_at = ? WHERE url = ?",
+                [(now, company['source_url']) for company in companies],
+            )
+
+    def detail_parsed(self, url: str, record: Dict):
+        self._execute(
+            "UPDATE details SET status = 'parsed', error = NULL, record = ?, updated_at = ? WHERE url = ?",
+            (json.dumps(record, ensure_ascii=False), time.time(), url),
+        )
+
+    def records_saved(self, records: List[Dict]):
+        """Writer callback: mark the rows of a successful upsert as saved"""
+        now = time.time()
+        rows = [(now, record['source_url']) for record in records if record.get('source_url')]
+        with self.lock, self.conn:
+            self.conn.executemany("UPDATE details SET status = 'saved', updated_at = ? WHERE url = ?", rows)
+            self.conn.executemany("INSERT OR REPLACE INTO checked (checked_at, url) VALUES (?, ?)", rows)
+
+    def checked_times(self) -> Dict[str, float]:
+        """source_url -> when the company was last scraped and saved (epoch seconds)"""
+        return dict(self._execute("SELECT url, checked_at FROM checked"))
+
+    def _failed(self, table: str, key_column: str, key, error: str) -> Optional[float]:
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                f"SELECT attempts FROM {table} WHERE {key_column} = ?", (key,)
+            ).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            status = 'failed' if attempts >= self.max_attempts else 'pending'
+            self.conn.execute(
+                f"UPDATE {table} SET status = ?, attempts = ?, error = ?, updated_at = ? WHERE {key_column} = ?",
+                (status, attempts, error, time.time(), key),
+            )
+        if status == 'failed':
+            return None
+        return self.retry_delay * 2 ** (attempts - 1)
+
+    def page_failed(self, page: int, error: str) -> Optional[float]:
+        """Record a failed listing page; returns the retry delay, or None once attempts are exhausted"""
+        return self._failed('pages', 'page', page, error)
+
+    def detail_failed(self, url: str, error: str) -> Optional[float]:
+        """Record a failed detail page; returns the retry delay, or None once attempts are exhausted"""
+        return self._failed('details', 'url', url, error)
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        summary = {}
+        for table in ('pages', 'details'):
+            rows = self._execute(f"SELECT status, COUNT(*) FROM {table} GROUP BY status")
+            summary[table] = dict(rows)
+        return summary
@@ -0,0 +1,266 @@
+import bisect
+import cProfile
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Upper bounds in seconds, roughly log-spaced from 1 ms to 30 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, str]) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process or its largest child, in MiB"""
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / scale
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile as the upper bound of the bucket containing it"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """In-process registry of counters, gauges and timing histograms.
+
+    Exposed as Prometheus text (serve) or as periodic JSON snapshots
+    (start_json_reporter) so a running crawl shows whether it is bound by
+    the network, parsing or database writes.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters: Dict[LabelKey, float] = {}
+        self.gauges: Dict[LabelKey, float] = {}
+        self.histograms: Dict[LabelKey, Histogram] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self.lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> Dict:
+        """JSON-friendly view including per-second rates for every counter"""
+        elapsed = max(time.time() - self.started, 1e-9)
+        with self.lock:
+            counters = {name + _format_labels(labels): value for (name, labels), value in self.counters.items()}
+            gauges = {name + _format_labels(labels): value for (name, labels), value in self.gauges.items()}
+            histograms = {
+                name + _format_labels(labels): {
+                    'count': h.count,
+                    'mean': h.sum / h.count if h.count else None,
+                    'p50': h.quantile(0.5),
+                    'p99': h.quantile(0.99),
+                }
+                for (name, labels), h in self.histograms.items()
+            }
+        return {
+            'timestamp': time.time(),
+            'elapsed_seconds': elapsed,
+            'counters': counters,
+            'rates_per_second': {name: value / elapsed for name, value in counters.items()},
+            'gauges': gauges,
+            'histograms': histograms,
+        }
+
+    def render_prometheus(self) -> str:
+        lines = []
+        typed = set()
+
+        def declare(name: str, kind: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                declare(name, 'counter')
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), value in sorted(self.gauges.items()):
+                declare(name, 'gauge')
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), h in sorted(self.histograms.items(), key=lambda item: item[0]):
+                declare(name, 'histogram')
+                cumulative = 0
+                for bound, count in zip(h.buckets + (float('inf'),), h.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Serve /metrics in Prometheus text format from a daemon thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def write_json(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def start_json_reporter(self, path: str, interval: float = 10.0) -> threading.Event:
+        """Write a snapshot to `path` every `interval` seconds; set the returned event to stop"""
+        stop = threading.Event()
+
+        def report():
+            while not stop.wait(interval):
+                self.write_json(path)
+            self.write_json(path)
+
+        threading.Thread(target=report, daemon=True).start()
+        return stop
+
+
+class _CollectedStats:
+    # pstats.Stats accepts any object exposing create_stats() and .stats
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def profiled_call(fn, *args):
+    """Run fn under cProfile and return (result, raw stats); picklable for process pools"""
+    profile = cProfile.Profile()
+    result = profile.runcall(fn, *args)
+    profile.create_stats()
+    return result, profile.stats
+
+
+class StageProfiler:
+    """Optional cProfile hook that accumulates stats per crawl stage (fetch, parse, write).
+
+    Only one profiler may be active per process (Python 3.12+ raises
+    ValueError otherwise), so calls made while another thread is being
+    profiled run unprofiled: concurrent stages such as fetch in the thread
+    pool are sampled rather than fully profiled. dump() reports the share.
+    """
+
+    def __init__(self, stages: Iterable[str] = (), directory: str = '.'):
+        self.stages: Set[str] = set(stages)
+        self.directory = directory
+        self.collected: Dict[str, pstats.Stats] = {}
+        self.calls: Dict[str, List[int]] = {}  # stage -> [profiled, total]
+        self.lock = threading.Lock()
+        self.active = threading.Lock()
+
+    def enabled(self, stage: str) -> bool:
+        return stage in self.stages
+
+    def add(self, stage: str, raw_stats):
+        with self.lock:
+            calls = self.calls.setdefault(stage, [0, 0])
+            calls[0] += 1
+            calls[1] += 1
+            if stage in self.collected:
+                self.collected[stage].add(_CollectedStats(raw_stats))
+            else:
+                self.collected[stage] = pstats.Stats(_CollectedStats(raw_stats))
+
+    def call(self, stage: str, fn, *args):
+        if not self.enabled(stage):
+            return fn(*args)
+        if not self.active.acquire(blocking=False):
+            with self.lock:
+                self.calls.setdefault(stage, [0, 0])[1] += 1
+            return fn(*args)
+        try:
+            result, raw_stats = profiled_call(fn, *args)
+        finally:
+            self.active.release()
+        self.add(stage, raw_stats)
+        return result
+
+    def dump(self):
+        for stage, stats in self.collected.items():
+            path = os.path.join(self.directory, f"profile_{stage}.prof")
+            stats.dump_stats(path)
+            profiled, total = self.calls.get(stage, (0, 0))
+            print(f"Wrote {stage} profile to {path}"
+                  + (f" ({profiled} of {total} calls profiled)" if total > profiled else ""))
+
+
+metrics = Metrics()
+profiler = StageProfiler()
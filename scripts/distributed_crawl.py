@@ -0,0 +1,279 @@
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+import requests
+
+import page_parser
+from company_sinks import MultiSink, open_file_sink
+from company_writer import CompanyWriter, DEFAULT_UPSERT_BATCH_SIZE
+from crawl_metrics import metrics
+from http_client import configure_session, configure_throttle, DEFAULT_TIMEOUT
+from page_parser import parse_company_details, parse_company_links, parse_listing, missing_details
+from rate_limiter import SharedRateLimiter
+from scrape_rikunabi import (DEFAULT_BURST, DEFAULT_RATE, discover_pagination, fetch_company_details,
+                             fetch_company_page)
+from work_queue import WorkQueue, DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, DEFAULT_QUEUE_PATH
+
+DEFAULT_LEASE_SIZE = 4
+# Seconds an idle worker waits before polling the queue again
+IDLE_SLEEP = 2.0
+
+
+def seed(queue: WorkQueue, years: List[int], end_page: Optional[int] = None):
+    """Queue every listing page of each graduation year"""
+    for year in years:
+        page_size = None
+        last_page = end_page
+        if last_page is None:
+            total, page_size = discover_pagination(year)
+            last_page = (total + page_size - 1) // page_size
+            print(f"{year}: {total} companies, {page_size} per page")
+        added = queue.add_pages(year, 1, last_page, page_size)
+        print(f"{year}: queued {added} new listing pages (1-{last_page})")
+
+
+class Worker:
+    """Pull work units from the queue until none are left.
+
+    Listing pages queue their companies as detail units; detail pages are
+    parsed and written to the sink. A unit is completed only after its record
+    has been written, so a worker that dies loses nothing: its leases expire
+    and another worker redoes the units, and the name-keyed upserts make the
+    rewrite harmless. All network requests draw from the queue's shared
+    rate budget (through the http_client throttle run_worker installs).
+    """
+
+    def __init__(self, queue: WorkQueue, sink, name: str,
+                 listing_only: bool = False, lease_size: int = DEFAULT_LEASE_SIZE):
+        self.queue = queue
+        self.sink = sink
+        self.name = name
+        self.listing_only = listing_only
+        self.lease_size = lease_size
+        # source_url -> ids of the units waiting on a record buffered in the
+        # sink but not yet written; a listing page unit owns every record taken
+        # from the page, and a company seen again on a page is owned by both
+        self.unwritten: Dict[str, Set[int]] = {}
+        self.lock = threading.Lock()
+
+    def records_written(self, records: List[Dict]):
+        """Sink callback: complete the units whose records have all been written"""
+        with self.lock:
+            unit_ids = set().union(*(self.unwritten.pop(record['source_url'], ()) for record in records))
+            unit_ids -= set().union(*self.unwritten.values())
+        self.queue.complete(self.name, list(unit_ids))
+
+    def release_unwritten(self):
+        # Called once the sink buffer is empty: records still waiting were in a
+        # batch that failed to write, so hand their units back to the queue
+        with self.lock:
+            unit_ids, self.unwritten = set().union(*self.unwritten.values()), {}
+        for unit_id in unit_ids:
+            self.queue.fail(self.name, unit_id, 'write failed')
+
+    def process_page(self, unit: Dict):
+        year, page = unit['year'], unit['item']['page']
+        print(f"[{self.name}] {year} page {page}")
+        content = fetch_company_page(page, year)
+        if content is None:
+            raise requests.RequestException('fetch failed')
+        metrics.inc('pages_fetched_total', kind='page')
+        companies = (parse_listing if self.listing_only else parse_company_links)(content)
+
+        found = len({company['source_url'] for company in companies})
+        page_size = unit['item'].get('page_size')
+        if not found and not unit['item'].get('grown'):
+            # Within the counted listing, so most likely a transient bad response
+            raise requests.RequestException('empty listing page')
+        if page_size and found >= page_size and page == self.queue.last_page(year):
+            self.queue.add_pages(year, page + 1, page + 1, page_size, grown=True)
+
+        complete = [company for company in companies if not missing_details(company)]
+        self.queue.add_companies(year, [company for company in companies if missing_details(company)])
+        if not complete:
+            self.queue.complete(self.name, [unit['id']])
+            return
+        # The page is completed by records_written once all its records are
+        # stored; if the write fails they stay unwritten and process() hands
+        # the page back to the queue, so a crash or a failed batch re-reads it
+        with self.lock:
+            for company in complete:
+                self.unwritten.setdefault(company['source_url'], set()).add(unit['id'])
+        self.sink.extend(complete)
+        self.sink.flush()
+        metrics.inc('details_from_listing_total', len(complete))
+
+    def process_company(self, unit: Dict):
+        company = unit['item']
+        content = fetch_company_details(company['source_url'])
+        if content is None:
+            raise requests.RequestException('fetch failed')
+        metrics.inc('pages_fetched_total', kind='company')
+        record = {**company, **parse_company_details(content)}
+        with self.lock:
+            self.unwritten.setdefault(record['source_url'], set()).add(unit['id'])
+        self.sink.add(record)
+
+    def process(self, unit: Dict):
+        try:
+            if unit['kind'] == 'page':
+                self.process_page(unit)
+            else:
+                self.process_company(unit)
+        except Exception as e:
+            delay = self.queue.fail(self.name, unit['id'], str(e))
+            if delay is None:
+                print(f"[{self.name}] Giving up on {unit['kind']} {unit['item']}: {e}")
+            return
+        if not self.sink.buffer and self.unwritten:
+            self.release_unwritten()
+
+    def heartbeat(self, stop: threading.Event):
+        while not stop.wait(self.queue.lease_seconds / 3):
+            self.queue.heartbeat(self.name)
+
+    def run(self, forever: bool = False):
+        stop = threading.Event()
+        threading.Thread(target=self.heartbeat, args=(stop,), daemon=True).start()
+        try:
+            while True:
+                units = self.queue.lease(self.name, self.lease_size)
+                if not units:
+                    # Write buffered records so their units count as finished
+                    self.sink.flush()
+                    self.release_unwritten()
+                    if not forever and not self.queue.outstanding():
+                        break
+                    time.sleep(IDLE_SLEEP)
+                    continue
+                for unit in units:
+                    self.process(unit)
+        finally:
+            self.sink.close()
+            self.release_unwritten()
+            stop.set()
+
+
+def worker_export_path(path: str, index: int, workers: int) -> str:
+    # Concurrent appends from several processes would interleave, so each
+    # worker process gets its own file: companies.jsonl -> companies.w1.jsonl
+    if workers == 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.w{index}{ext}"
+
+
+def run_worker(args, index: int):
+    if args.base_url:
+        page_parser.set_base_url(args.base_url)
+    configure_session(timeout=(DEFAULT_TIMEOUT[0], args.timeout))
+    queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts,
+                      shared=args.shared)
+    name = f"{socket.gethostname()}-{os.getpid()}"
+    # Network requests draw from the queue's shared budget; cache hits do not
+    configure_throttle(SharedRateLimiter(queue, args.rate, args.burst).acquire)
+    worker = Worker(queue, None, name, args.listing_only, args.lease_size)
+
+    sinks = []
+    if not args.no_db:
+        sinks.append(CompanyWriter(batch_size=args.batch_size, update_existing=args.update_existing))
+    for path in args.export:
+        sinks.append(open_file_sink(worker_export_path(path, index, args.workers)))
+    # Units complete once every sink has written their records
+    worker.sink = MultiSink(sinks, on_write=worker.records_written)
+
+    print(f"Worker {name} started")
+    worker.run(forever=args.forever)
+    queue.close()
+    print(f"Worker {name} finished")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded Rikunabi crawl: a coordinator queues work units "
+                                                 "and any number of workers process them")
+    parser.add_argument('--queue', default=DEFAULT_QUEUE_PATH,
+                        help="SQLite work queue shared by the coordinator and all workers")
+    parser.add_argument('--shared', action='store_true',
+                        help="The queue file is on a network filesystem used by workers on several "
+                             "machines: use a rollback journal instead of WAL (which is single-host only)")
+    parser.add_argument('--base-url', default=None,
+                        help=f"Site root to crawl (default: {page_parser.DEFAULT_BASE_URL}, or RIKUNABI_BASE_URL)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help="Queue the listing pages of one or more graduation years")
+    seed_parser.add_argument('--years', type=int, nargs='+', default=[page_parser.YEAR],
+                             help="Graduation years to crawl, e.g. --years 2026 2027")
+    seed_parser.add_argument('--end-page', type=int, default=None,
+                             help="Last listing page per year (default: read from the first page)")
+    seed_parser.add_argument('--retry-failed', action='store_true',
+                             help="Give failed units, and pages older queues skipped, a fresh set of attempts")
+
+    work_parser = commands.add_parser('work', help="Process queued units until the queue is drained")
+    work_parser.add_argument('--workers', type=int, default=1,
+                             help="Worker processes to start on this machine")
+    work_parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                             help="Requests per second per host, shared by every worker on the queue")
+    work_parser.add_argument('--burst', type=float, default=DEFAULT_BURST,
+                             help="Shared token bucket capacity per host")
+    work_parser.add_argument('--lease-size', type=int, default=DEFAULT_LEASE_SIZE,
+                             help="Units claimed per lease")
+    work_parser.add_argument('--lease-seconds', type=float, default=DEFAULT_LEASE_SECONDS,
+                             help="Seconds before an unrenewed lease is handed to another worker")
+    work_parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                             help="Attempts per unit before it is marked failed")
+    work_parser.add_argument('--listing-only', action='store_true',
+                             help="Take industry and location from listing pages when shown there")
+    work_parser.add_argument('--batch-size', type=int, default=DEFAULT_UPSERT_BATCH_SIZE,
+                             help="Companies sent per bulk upsert")
+    work_parser.add_argument('--update-existing', action='store_true',
+                             help="Overwrite companies that already exist instead of skipping them")
+    work_parser.add_argument('--export', action='append', default=[],
+                             help="Also stream records to a .jsonl or .parquet file (repeatable)")
+    work_parser.add_argument('--no-db', action='store_true',
+                             help="Only write to the --export files, not to Supabase")
+    work_parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT[1],
+                             help="Read timeout in seconds for each request")
+    work_parser.add_argument('--forever', action='store_true',
+                             help="Keep polling for new units instead of exiting when the queue is empty")
+
+    commands.add_parser('status', help="Show unit counts per year, kind and status")
+    args = parser.parse_args()
+
+    if args.base_url:
+        page_parser.set_base_url(args.base_url)
+
+    if args.command == 'seed':
+        queue = WorkQueue(args.queue, shared=args.shared)
+        seed(queue, args.years, args.end_page)
+        if args.retry_failed:
+            print(f"Retrying {queue.retry_failed()} failed units")
+        print(f"Queue status: {queue.summary()}")
+        queue.close()
+    elif args.command == 'status':
+        queue = WorkQueue(args.queue, shared=args.shared)
+        print(f"Queue status: {queue.summary()}")
+        queue.close()
+    else:
+        if args.no_db and not args.export:
+            parser.error("--no-db requires --export")
+        if args.workers == 1:
+            run_worker(args, 0)
+        else:
+            processes = [multiprocessing.Process(target=run_worker, args=(args, index))
+                         for index in range(args.workers)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        queue = WorkQueue(args.queue, shared=args.shared)
+        print(f"Queue status: {queue.summary()}")
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
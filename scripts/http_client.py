@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+from typing import Callable, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from crawl_metrics import metrics
+from page_cache import PageCache
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# (connect, read) timeout in seconds
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 30.0)
+DEFAULT_POOL_SIZE = 16
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT
+_lock = threading.Lock()
+
+# Page cache used by fetch_content; configured explicitly or via RIKUNABI_CACHE_DIR
+_cache: Optional[PageCache] = None
+_cache_configured = False
+
+# Called with the URL before every network request (not for cache hits)
+_throttle: Optional[Callable[[str], None]] = None
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        # DNS resolution plus TCP connect; only runs for new pooled connections
+        with metrics.timer('http_connect_seconds', host=self.host):
+            return super()._new_conn()
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def _new_conn(self):
+        with metrics.timer('http_connect_seconds', host=self.host):
+            return super()._new_conn()
+
+    def connect(self):
+        # Full handshake: DNS, TCP and TLS
+        with metrics.timer('http_handshake_seconds', host=self.host):
+            super().connect()
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _InstrumentedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+def _build_session(pool_size: int, max_retries: int, backoff_factor: float) -> requests.Session:
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = _InstrumentedAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def configure_session(pool_size: int = DEFAULT_POOL_SIZE, max_retries: int = DEFAULT_MAX_RETRIES,
+                      backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                      timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT) -> requests.Session:
+    """Replace the shared session with one using the given pool, retry and timeout settings"""
+    global _session, _timeout
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = _build_session(pool_size, max_retries, backoff_factor)
+        _timeout = timeout
+        return _session
+
+
+def get_session() -> requests.Session:
+    """Return the shared keep-alive session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session(DEFAULT_POOL_SIZE, DEFAULT_MAX_RETRIES, DEFAULT_BACKOFF_FACTOR)
+    return _session
+
+
+def configure_throttle(throttle: Optional[Callable[[str], None]]):
+    """Call `throttle(url)` before each network request, e.g. a rate limiter's blocking acquire.
+
+    Pages served from the page cache never reach fetch, so replays and
+    re-parses run at full speed while real traffic stays rate limited.
+    """
+    global _throttle
+    _throttle = throttle
+
+
+def fetch(url: str, params: Optional[dict] = None, timeout=None, **kwargs) -> requests.Response:
+    """GET a URL through the shared session with the configured timeout"""
+    if _throttle is not None:
+        _throttle(url)
+    start = time.perf_counter()
+    response = get_session().get(url, params=params, timeout=timeout or _timeout, **kwargs)
+    total = time.perf_counter() - start
+
+    # elapsed stops once the headers are parsed; the rest is reading the body
+    ttfb = response.elapsed.total_seconds()
+    metrics.observe('http_ttfb_seconds', ttfb)
+    metrics.observe('http_download_seconds', max(total - ttfb, 0.0))
+    metrics.inc('http_requests_total', status=response.status_code)
+    metrics.inc('http_response_bytes_total', len(response.content))
+    return response
+
+
+def configure_cache(cache: Optional[PageCache]):
+    """Route fetch_content through the given page cache (None disables caching)"""
+    global _cache, _cache_configured
+    _cache = cache
+    _cache_configured = True
+
+
+def get_cache() -> Optional[PageCache]:
+    global _cache, _cache_configured
+    if not _cache_configured:
+        directory = os.environ.get('RIKUNABI_CACHE_DIR')
+        if directory:
+            _cache = PageCache(directory, offline=os.environ.get('RIKUNABI_CACHE_OFFLINE') == '1')
+        _cache_configured = True
+    return _cache
+
+
+def fetch_content(url: str, params: Optional[dict] = None) -> bytes:
+    """Return the body of a successful GET, served from the page cache when one is configured"""
+    cache = get_cache()
+    if cache is not None:
+        return cache.fetch(url, params, fetch)
+    response = fetch(url, params=params)
+    response.raise_for_status()
+    return response.content
@@ -0,0 +1,159 @@
+import argparse
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from change_detection import normalize
+from crawl_metrics import metrics
+from known_companies import fetch_all_rows
+
+DEFAULT_UPDATE_BATCH_SIZE = 500
+DESCRIPTION_PREFIX = '業種:'
+# Separators between industries once NFKC has folded ／ and ， to ASCII
+SEGMENT_SEPARATOR = re.compile(r'\s*[/、,]\s*')
+MIN_KEYWORD_LENGTH = 2
+
+# Rikunabi industry terms mapped onto the industries seeded in 002_seed_data.sql,
+# on top of each industry's own name. The industries.keywords column is not
+# used: it holds interview topics (流通, 技術, ...), not industry names.
+# Terms match whole segments or their start, so avoid short prefixes of
+# unrelated industries (通信 would also catch 通信販売).
+INDUSTRY_ALIASES = {
+    'IT・ソフトウェア': ('ソフトウェア', '情報処理', 'インターネット', '情報通信', '通信キャリア', 'ゲーム',
+                      'システムインテグレータ', 'SIer'),
+    '金融': ('銀行', '都市銀行', '地方銀行', '信託銀行', '証券', '保険', '損保', '生保', 'クレジット', '信販',
+           'リース', '共済', '信用金庫'),
+    '商社・貿易': ('商社', '総合商社', '専門商社', '貿易'),
+    'メーカー・製造業': ('メーカー', '自動車', '輸送用機器', '電機', '電子部品', '機械', '化学', '食品', '医薬品',
+                   '化粧品', 'トイレタリー', '鉄鋼', '金属', '繊維', '半導体', '精密機器', '住宅設備'),
+    'コンサルティング': ('コンサルタント', 'コンサルティング', 'シンクタンク'),
+    '広告・マーケティング': ('広告', 'マーケティング', '出版', '放送', 'マスコミ'),
+}
+
+
+def industry_segments(value: Optional[str]) -> List[str]:
+    """Split a scraped industry string into normalized, de-duplicated industries"""
+    text = normalize(value)
+    if text.startswith(DESCRIPTION_PREFIX):
+        text = text[len(DESCRIPTION_PREFIX):]
+    segments = []
+    for segment in SEGMENT_SEPARATOR.split(text):
+        segment = segment.strip()
+        if segment and segment not in segments:
+            segments.append(segment)
+    return segments
+
+
+class IndustryIndex:
+    """Keyword -> industry id lookup compiled into a single regex.
+
+    Keywords come from each industry's name (split on ・) and
+    INDUSTRY_ALIASES. A keyword must equal the segment or start it; matching
+    anywhere inside a segment mapped ガス・エネルギー or 流通・小売 to 商社.
+    Only the first segment of a company's industry string is matched:
+    Rikunabi lists the main industry first, and later segments are often
+    side businesses.
+    """
+
+    def __init__(self, industries: Iterable[Dict]):
+        self.names: Dict[str, str] = {}
+        self.keywords: Dict[str, str] = {}
+        for industry in industries:
+            self.names[industry['id']] = industry['name']
+            terms = [industry['name'], *industry['name'].split('・')]
+            terms += INDUSTRY_ALIASES.get(industry['name'], ())
+            for term in terms:
+                term = normalize(term)
+                if len(term) >= MIN_KEYWORD_LENGTH:
+                    self.keywords.setdefault(term, industry['id'])
+        # Longest keywords first so the most specific prefix wins
+        alternatives = sorted(self.keywords, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(map(re.escape, alternatives))) if alternatives else None
+
+    def lookup(self, segments: List[str]) -> Optional[str]:
+        if not segments or self.pattern is None:
+            return None
+        match = self.pattern.match(segments[0])
+        return self.keywords[match.group(0)] if match else None
+
+
+def plan_updates(rows: Iterable[Dict], index: IndustryIndex, unmapped: Optional[Counter] = None,
+                 overwrite: bool = False) -> List[Dict]:
+    """Return {name, industry_text, industry_id} for every row whose values would change.
+
+    A company that already has an industry_id keeps it (it may have been set
+    by hand) unless `overwrite` is given.
+    """
+    updates = []
+    for row in rows:
+        description = row.get('description') or ''
+        # The scraper stores the industry as "業種: ..." in description
+        if normalize(description).startswith(DESCRIPTION_PREFIX):
+            source = description
+        else:
+            source = row.get('industry_text')
+        segments = industry_segments(source)
+        if not segments:
+            continue
+        industry_text = '/'.join(segments)
+        industry_id = row.get('industry_id')
+        if industry_id is None or overwrite:
+            # Never clear an existing industry_id, even with overwrite
+            industry_id = index.lookup(segments) or industry_id
+        if industry_id is None and unmapped is not None:
+            unmapped[segments[0]] += 1
+        if industry_text != row.get('industry_text') or industry_id != row.get('industry_id'):
+            updates.append({'name': row['name'], 'industry_text': industry_text, 'industry_id': industry_id})
+    return updates
+
+
+def apply_updates(updates: List[Dict], client=None, batch_size: int = DEFAULT_UPDATE_BATCH_SIZE,
+                  table: str = 'companies') -> int:
+    """Write updates in batches; an upsert on name with only these columns leaves the rest untouched"""
+    if client is None:
+        from supabase_client import supabase
+        client = supabase
+    written = 0
+    for i in range(0, len(updates), batch_size):
+        batch = updates[i:i + batch_size]
+        try:
+            with metrics.timer('db_write_seconds'):
+                client.table(table).upsert(batch, on_conflict='name').execute()
+        except Exception as e:
+            print(f"Error updating batch of {len(batch)} companies: {e}")
+            continue
+        written += len(batch)
+        print(f"Updated {written}/{len(updates)} companies")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize scraped industries and map them to industries rows")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_UPDATE_BATCH_SIZE,
+                        help="Companies per batched update")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Report what would change without writing")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="Remap companies that already have an industry_id (default: keep it)")
+    args = parser.parse_args()
+
+    from supabase_client import supabase
+    index = IndustryIndex(supabase.table('industries').select('id, name').execute().data)
+    rows = fetch_all_rows('name, description, industry_text, industry_id', supabase)
+    print(f"Loaded {len(rows)} companies and {len(index.names)} industries ({len(index.keywords)} keywords)")
+
+    unmapped: Counter = Counter()
+    updates = plan_updates(rows, index, unmapped, args.overwrite)
+    mapped = Counter(index.names.get(update['industry_id'], 'unmapped') for update in updates)
+    print(f"{len(updates)} companies to update: {dict(mapped)}")
+    if unmapped:
+        print("Most common unmapped industries (candidates for INDUSTRY_ALIASES):")
+        for segment, count in unmapped.most_common(15):
+            print(f"  {count:5d}  {segment}")
+
+    if not args.dry_run:
+        apply_updates(updates, supabase, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
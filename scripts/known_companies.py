@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# PostgREST caps each response, so the preload pages through the table
+PAGE_SIZE = 1000
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+class KnownCompanies:
+    """Index of companies already stored in Supabase, keyed by source_url and name.
+
+    `checked` maps source_url to when a crawl last scraped the company
+    (CrawlJournal.checked_times); a company counts as fresh if either that
+    or its updated_at is recent, so rows that change detection did not
+    rewrite are not refetched on every run.
+    """
+
+    def __init__(self, rows: Iterable[Dict], refresh_days: Optional[float] = None,
+                 checked: Optional[Dict[str, float]] = None):
+        self.cutoff = None
+        if refresh_days is not None:
+            self.cutoff = datetime.now(timezone.utc) - timedelta(days=refresh_days)
+        self.by_url: Dict[str, Optional[datetime]] = {}
+        self.by_name: Dict[str, Optional[datetime]] = {}
+        checked = checked or {}
+        for row in rows:
+            updated_at = _parse_timestamp(row.get('updated_at') or row.get('created_at'))
+            if row.get('source_url') in checked:
+                checked_at = datetime.fromtimestamp(checked[row['source_url']], timezone.utc)
+                updated_at = max(updated_at, checked_at) if updated_at else checked_at
+            if row.get('source_url'):
+                self.by_url[row['source_url']] = updated_at
+            if row.get('name'):
+                self.by_name[row['name']] = updated_at
+
+    def __len__(self) -> int:
+        return len(self.by_name)
+
+    def is_fresh(self, company: Dict) -> bool:
+        """True if the company is stored and, when refreshing, was updated after the cutoff"""
+        key = company.get('source_url')
+        if key in self.by_url:
+            updated_at = self.by_url[key]
+        elif company.get('name') in self.by_name:
+            updated_at = self.by_name[company['name']]
+        else:
+            return False
+        if self.cutoff is None:
+            return True
+        return updated_at is not None and updated_at >= self.cutoff
+
+    def partition(self, companies: Iterable[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Split companies into (to_fetch, fresh)"""
+        to_fetch, fresh = [], []
+        for company in companies:
+            (fresh if self.is_fresh(company) else to_fetch).append(company)
+        return to_fetch, fresh
+
+
+def fetch_all_rows(columns: str, client=None, table: str = 'companies',
+                   updated_since: Optional[str] = None) -> List[Dict]:
+    """Read `columns` of every row of `table` (or those updated after `updated_since`), one page at a time"""
+    if client is None:
+        from supabase_client import supabase
+        client = supabase
+    rows = []
+    start = 0
+    while True:
+        query = client.table(table).select(columns)
+        if updated_since:
+            query = query.gt('updated_at', updated_since)
+        result = (query
+                  .order('id')
+                  .range(start, start + PAGE_SIZE - 1)
+                  .execute())
+        rows.extend(result.data)
+        if len(result.data) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    return rows
+
+
+def load_known_companies(client=None, refresh_days: Optional[float] = None,
+                         table: str = 'companies', checked: Optional[Dict[str, float]] = None) -> KnownCompanies:
+    """Preload name/source_url/updated_at for every stored company"""
+    return KnownCompanies(fetch_all_rows('name, source_url, updated_at', client, table), refresh_days, checked)
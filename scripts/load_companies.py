@@ -0,0 +1,33 @@
+import argparse
+import os
+import time
+
+from company_sinks import copy_into_postgres, iter_record_batches
+from company_writer import CompanyWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a JSONL/Parquet company export into the companies table")
+    parser.add_argument('path', help="Export written by scrape_rikunabi.py --export")
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL'),
+                        help="Postgres connection string; loads with COPY instead of REST upserts "
+                             "(default: DATABASE_URL)")
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help="Companies sent per bulk upsert when loading through Supabase")
+    parser.add_argument('--update-existing', action='store_true',
+                        help="Overwrite companies that already exist instead of skipping them")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.dsn:
+        rows = copy_into_postgres(args.path, args.dsn, update_existing=args.update_existing)
+        print(f"COPY loaded {rows} companies from {args.path}")
+    else:
+        with CompanyWriter(batch_size=args.batch_size, update_existing=args.update_existing) as writer:
+            for batch in iter_record_batches(args.path, args.batch_size):
+                writer.extend(batch)
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import gzip
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from synthetic_pages import company_page, listing_companies, listing_page, synthetic_company
+
+DEFAULT_PORT = 8765
+DEFAULT_TOTAL = 11976
+DEFAULT_PER_PAGE = 100
+
+COMPANY_PATH = re.compile(r'^/\d{4}/company/r(\d+)/?$')
+LISTING_PATH = re.compile(r'^/(\d{4})/s/?$')
+
+
+class MockRikunabi:
+    """Behaviour knobs and counters shared by all request handler threads"""
+
+    def __init__(self, total: int = DEFAULT_TOTAL, per_page: int = DEFAULT_PER_PAGE,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, rate_limit: float = 0.0, retry_after: int = 1,
+                 seed: int = 0, listing_details: str = 'none'):
+        self.total = total
+        self.per_page = per_page
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.seed = seed
+        self.listing_details = listing_details
+        self.random = random.Random(seed)
+        self.statuses: Counter = Counter()
+        self.lock = threading.Lock()
+        # Sliding one-second window for the global rate limit
+        self.window_start = time.monotonic()
+        self.window_count = 0
+
+    def over_rate_limit(self) -> bool:
+        if not self.rate_limit:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 1.0:
+                self.window_start = now
+                self.window_count = 0
+            self.window_count += 1
+            return self.window_count > self.rate_limit
+
+    def roll(self, probability: float) -> bool:
+        if not probability:
+            return False
+        with self.lock:
+            return self.random.random() < probability
+
+    def delay(self) -> float:
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def record(self, status: int):
+        with self.lock:
+            self.statuses[status] += 1
+
+    def render(self, path: str, query: dict):
+        """Return the HTML for a path, or None if it does not exist"""
+        match = LISTING_PATH.match(path)
+        if match:
+            page = int(query.get('pn', ['1'])[0] or 1)
+            companies = listing_companies(page, self.per_page, self.total, self.seed) if page >= 1 else []
+            return listing_page(companies, self.total, page, self.listing_details, int(match.group(1)))
+        match = COMPANY_PATH.match(path)
+        if match:
+            index = int(match.group(1)) - 100000000
+            if 0 <= index < self.total:
+                return company_page(synthetic_company(index, self.seed))
+        return None
+
+
+def make_handler(site: MockRikunabi):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def send_body(self, status: int, body: bytes = b'', headers=None):
+            headers = dict(headers or {})
+            if body and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip.compress(body, compresslevel=5)
+                headers['Content-Encoding'] = 'gzip'
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+            site.record(status)
+
+        def do_GET(self):
+            time.sleep(site.delay())
+            if site.over_rate_limit() or site.roll(site.throttle_rate):
+                self.send_body(429, b'Too Many Requests', {'Retry-After': str(site.retry_after)})
+                return
+            if site.roll(site.error_rate):
+                self.send_body(site.random.choice([500, 502, 503]), b'Server Error')
+                return
+
+            url = urlparse(self.path)
+            html = site.render(url.path, parse_qs(url.query))
+            if html is None:
+                self.send_body(404, b'Not Found')
+                return
+
+            body = html.encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_body(304, headers={'ETag': etag})
+                return
+            self.send_body(200, body, {'Content-Type': 'text/html; charset=utf-8', 'ETag': etag})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(site: MockRikunabi, port: int = DEFAULT_PORT, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Start the mock site in a daemon thread and return the server"""
+    server = ThreadingHTTPServer((host, port), make_handler(site))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for job.rikunabi.com for load-testing the crawler")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--total', type=int, default=DEFAULT_TOTAL,
+                        help="Number of synthetic companies")
+    parser.add_argument('--per-page', type=int, default=DEFAULT_PER_PAGE,
+                        help="Companies per listing page")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help="Random +/- seconds applied to the latency")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Probability of answering with a 5xx")
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help="Probability of answering with a 429")
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help="Requests per second served before answering 429 (0 = unlimited)")
+    parser.add_argument('--retry-after', type=int, default=1,
+                        help="Retry-After seconds sent with 429 responses")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--listing-details', choices=['none', 'markup', 'json'], default='none',
+                        help="Show industry and head office on listing pages as card markup or embedded JSON")
+    args = parser.parse_args()
+
+    site = MockRikunabi(args.total, args.per_page, args.latency, args.jitter, args.error_rate,
+                        args.throttle_rate, args.rate_limit, args.retry_after, args.seed,
+                        args.listing_details)
+    server = serve(site, args.port, args.host)
+    print(f"Mock Rikunabi listening on http://{args.host}:{args.port} "
+          f"({args.total} companies); crawl it with --base-url or RIKUNABI_BASE_URL")
+
+    try:
+        while True:
+            time.sleep(10)
+            print(f"Responses so far: {dict(site.statuses)}")
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Final responses: {dict(site.statuses)}")
+
+
+if __name__ == "__main__":
+    main()
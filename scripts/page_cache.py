@@ -0,0 +1,166 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+
+from crawl_metrics import metrics
+
+DEFAULT_TTL = 24 * 60 * 60  # seconds before a cached page is revalidated
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# Stores between eviction sweeps; a sweep stats every file in the cache
+EVICT_INTERVAL = 200
+
+
+class CacheMiss(requests.RequestException):
+    """Raised in offline mode when a page is not in the cache"""
+
+
+class PageCache:
+    """On-disk gzip cache of raw pages keyed by the SHA-256 of their URL.
+
+    Pages younger than `ttl` are served without touching the network. Older
+    pages are revalidated with If-None-Match / If-Modified-Since, so an
+    unchanged page costs a 304 instead of a full download. File mtimes track
+    last access and the least recently used pages are evicted once the cache
+    grows past `max_bytes`. In offline mode only cached pages are returned.
+    """
+
+    def __init__(self, directory: str, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES, offline: bool = False):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.stores = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def full_url(url: str, params: Optional[dict] = None) -> str:
+        if not params:
+            return url
+        return requests.Request('GET', url, params=params).prepare().url
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, digest[:2], digest)
+        return f"{base}.html.gz", f"{base}.json"
+
+    def load(self, url: str) -> Optional[Tuple[Dict, bytes]]:
+        """Return (metadata, content) for a cached URL, or None"""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with gzip.open(body_path, 'rb') as f:
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        # Record the access for LRU eviction
+        now = time.time()
+        try:
+            os.utime(body_path, (now, now))
+        except OSError:
+            pass
+        return meta, content
+
+    def store(self, url: str, content: bytes, headers=None) -> Dict:
+        headers = headers or {}
+        body_path, meta_path = self._paths(url)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        meta = {
+            'url': url,
+            'fetched_at': time.time(),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'size': len(content),
+        }
+        # Write to temporary files and rename so readers never see partial pages
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(body_path + suffix, 'wb', compresslevel=5) as f:
+            f.write(content)
+        with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(body_path + suffix, body_path)
+        os.replace(meta_path + suffix, meta_path)
+
+        with self.lock:
+            self.stores += 1
+            sweep = self.stores % EVICT_INTERVAL == 0
+        if sweep:
+            self.evict()
+        return meta
+
+    def _touch_meta(self, url: str, meta: Dict):
+        _, meta_path = self._paths(url)
+        meta['fetched_at'] = time.time()
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def fetch(self, url: str, params: Optional[dict],
+              get: Callable[..., requests.Response]) -> bytes:
+        """Return page content from the cache, revalidating or downloading with `get` as needed"""
+        url = self.full_url(url, params)
+        cached = self.load(url)
+
+        if cached is not None:
+            meta, content = cached
+            if self.offline or time.time() - meta.get('fetched_at', 0) < self.ttl:
+                metrics.inc('page_cache_requests_total', result='hit')
+                return content
+        elif self.offline:
+            metrics.inc('page_cache_requests_total', result='miss')
+            raise CacheMiss(f"{url} is not cached")
+
+        headers = {}
+        if cached is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = get(url, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            metrics.inc('page_cache_requests_total', result='revalidated')
+            self._touch_meta(url, meta)
+            return content
+        metrics.inc('page_cache_requests_total', result='miss')
+        response.raise_for_status()
+        self.store(url, response.content, response.headers)
+        return response.content
+
+    def evict(self):
+        """Delete least recently used pages until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.html.gz'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            for stale in (path, path[:-len('.html.gz')] + '.json'):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+            total -= size
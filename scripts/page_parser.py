@@ -0,0 +1,353 @@
+import json
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+DEFAULT_BASE_URL = "https://job.rikunabi.com"
+# Point at a local stand-in (see mock_rikunabi_server.py) with RIKUNABI_BASE_URL
+BASE_URL = os.environ.get('RIKUNABI_BASE_URL', DEFAULT_BASE_URL).rstrip('/')
+# Graduation year whose listing is crawled; each year lives under /<year>/
+DEFAULT_YEAR = 2026
+YEAR = int(os.environ.get('RIKUNABI_YEAR', DEFAULT_YEAR))
+
+
+def listing_url(year: Optional[int] = None) -> str:
+    return f"{BASE_URL}/{year or YEAR}/s/"
+
+
+LISTING_URL = listing_url()
+
+
+def set_base_url(base_url: str):
+    """Switch the site root for this process and any parser processes it starts"""
+    global BASE_URL, LISTING_URL
+    BASE_URL = base_url.rstrip('/')
+    LISTING_URL = listing_url()
+    os.environ['RIKUNABI_BASE_URL'] = BASE_URL
+
+
+def set_year(year: int):
+    """Switch the default graduation year for this process and its parser processes"""
+    global YEAR, LISTING_URL
+    YEAR = year
+    LISTING_URL = listing_url()
+    os.environ['RIKUNABI_YEAR'] = str(year)
+
+
+def _default_backend() -> str:
+    """Prefer lxml when it is installed, falling back to the stdlib parser"""
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+
+# Override with RIKUNABI_PARSER=html.parser|lxml|html5lib
+PARSER_BACKEND = os.environ.get('RIKUNABI_PARSER') or _default_backend()
+
+# Only build the parts of the tree the extractors look at
+COMPANY_LINKS = SoupStrainer('a', href=True)
+COMPANY_DATA_TABLE = SoupStrainer('table', class_='ts-h-company-dataTable')
+
+WHITESPACE = re.compile(r'\s+')
+# Elements that wrap one search result; a result card never extends past them
+ITEM_TAGS = ('li', 'article', 'tr')
+ITEM_CLASS_HINTS = ('cassette', 'card', 'item')
+# Result counter on listing pages, e.g. "該当企業 11,976社"
+RESULT_COUNT = re.compile(r'該当[^\d]{0,20}?([\d,]+)\s*(?:社|件)')
+
+COMPANY_ID = re.compile(r'/company/(r\d+)')
+COMPANY_PATH = re.compile(r'/(\d{4})/company/(r\d+)')
+# Fields a record needs before its detail page can be skipped
+DETAIL_FIELDS = ('description', 'location')
+# Labels and JSON keys under which listings show a company's industry and head office
+INDUSTRY_LABELS = ('業種',)
+LOCATION_LABELS = ('本社', '本社所在地')
+INDUSTRY_KEYS = ('industry', 'industryName', 'gyoshu', 'gyoshuName', 'businessType', '業種')
+LOCATION_KEYS = ('location', 'headOffice', 'honsha', 'honshaName', 'prefecture', '本社', '本社所在地')
+URL_KEYS = ('url', 'href', 'link', 'companyUrl', 'detailUrl')
+ID_KEYS = ('id', 'companyId', 'corpId', 'kigyoCd')
+
+
+def make_soup(content, parse_only: Optional[SoupStrainer] = None, backend: Optional[str] = None) -> BeautifulSoup:
+    return BeautifulSoup(content, backend or PARSER_BACKEND, parse_only=parse_only)
+
+
+def is_company_link(href: str) -> bool:
+    return bool(COMPANY_PATH.search(href)) and '/seminars/' not in href and '/entries/' not in href
+
+
+def company_url(href: str) -> str:
+    """Canonical profile URL for a company link, ignoring query strings and subpages"""
+    match = COMPANY_PATH.search(href)
+    if match is None:
+        return f"{BASE_URL}{href}"
+    return f"{BASE_URL}/{match.group(1)}/company/{match.group(2)}/"
+
+
+def iter_company_links(content) -> Iterator[Dict]:
+    """Yield company names and profile URLs from a listing page as they are found"""
+    soup = make_soup(content, parse_only=COMPANY_LINKS)
+    try:
+        for link in soup.find_all('a', href=True):
+            if not is_company_link(link['href']):
+                continue
+            company_name = link.get_text(strip=True)
+            if company_name and company_name != '企業検索':
+                yield {
+                    'name': company_name,
+                    'source_url': company_url(link['href']),
+                }
+    finally:
+        # Soup trees are full of parent/child reference cycles; breaking them
+        # frees the page now instead of at the next cyclic GC pass
+        soup.decompose()
+
+
+def parse_company_links(content) -> List[Dict]:
+    """Extract company names and profile URLs from a listing page"""
+    return list(iter_company_links(content))
+
+
+def _company_id(href: str) -> Optional[str]:
+    match = COMPANY_ID.search(href)
+    return match.group(1) if match else None
+
+
+def _json_text(value) -> Optional[str]:
+    if isinstance(value, str):
+        return _clean(value) or None
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return '／'.join(_clean(item) for item in value if item.strip()) or None
+    if isinstance(value, dict):
+        return _json_text(value.get('name'))
+    return None
+
+
+def _first_text(data: Dict, keys) -> Optional[str]:
+    for key in keys:
+        value = _json_text(data.get(key))
+        if value:
+            return value
+    return None
+
+
+def _embedded_fields(soup: BeautifulSoup) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    # Walk JSON <script> blocks (e.g. __NEXT_DATA__ or ld+json) for objects
+    # that identify a company by profile URL or r-number and carry its
+    # industry or head office.
+    found = {}
+    stack = []
+    for script in soup.find_all('script', type=re.compile('json', re.I)):
+        try:
+            stack.append(json.loads(script.string or ''))
+        except ValueError:
+            continue
+
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+        stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+
+        company_id = None
+        for key in URL_KEYS:
+            if isinstance(node.get(key), str):
+                company_id = _company_id(node[key])
+                if company_id:
+                    break
+        if company_id is None:
+            for key in ID_KEYS:
+                value = node.get(key)
+                if isinstance(value, str) and re.fullmatch(r'r\d+', value):
+                    company_id = value
+                    break
+        if company_id is None:
+            continue
+        industry = _first_text(node, INDUSTRY_KEYS)
+        location = _first_text(node, LOCATION_KEYS)
+        if industry or location:
+            found[company_id] = (industry, location)
+    return found
+
+
+def _is_item_container(tag) -> bool:
+    if tag.name in ITEM_TAGS:
+        return True
+    return any(hint in cls.lower() for cls in tag.get('class') or () for hint in ITEM_CLASS_HINTS)
+
+
+def _cards(links) -> Dict[int, object]:
+    # A link's result card is its nearest item container (li, cassette, ...)
+    # or else its widest ancestor that holds no other company's links. One
+    # pass over the links' ancestors records which companies each element
+    # contains, instead of searching every ancestor.
+    owners: Dict[int, set] = {}
+    for link, company_id in links:
+        for parent in link.parents:
+            owners.setdefault(id(parent), set()).add(company_id)
+
+    cards = {}
+    for link, company_id in links:
+        card = link
+        for parent in link.parents:
+            if parent.name in (None, '[document]', 'html', 'body'):
+                # Nothing but the page itself bounded the climb (e.g. the only
+                # company on the page), so the "card" would take in the
+                # filter sidebar's labels too
+                if not _is_item_container(card):
+                    card = None
+                break
+            if len(owners[id(parent)]) > 1:
+                break
+            card = parent
+            if _is_item_container(parent):
+                break
+        cards[id(link)] = card
+    return cards
+
+
+def _card_fields(card) -> Tuple[Optional[str], Optional[str]]:
+    industry_part = location_part = None
+    for label in card.find_all(['th', 'dt', 'span', 'div', 'p']):
+        text = label.get_text(strip=True)
+        if text not in INDUSTRY_LABELS and text not in LOCATION_LABELS:
+            continue
+        value_tag = label.find_next_sibling()
+        if value_tag is None:
+            continue
+        value = _clean(value_tag.get_text(strip=True))
+        if text in INDUSTRY_LABELS and industry_part is None:
+            industry_part = value
+        elif text in LOCATION_LABELS and location_part is None:
+            location_part = value
+    return industry_part, location_part
+
+
+def parse_listing(content) -> List[Dict]:
+    """Extract companies from a listing page together with any details shown there.
+
+    Records have the keys of parse_company_links, plus description and
+    location when the result cards or JSON embedded in the page include
+    them, formatted as parse_company_details would.
+    """
+    soup = make_soup(content)
+    embedded = _embedded_fields(soup)
+    links = [(link, _company_id(link['href'])) for link in soup.find_all('a', href=True)
+             if is_company_link(link['href'])]
+    cards = _cards(links)
+    companies = []
+
+    for link, company_id in links:
+        company_name = link.get_text(strip=True)
+        if not company_name or company_name == '企業検索':
+            continue
+        card = cards[id(link)]
+        industry_part, location_part = _card_fields(card) if card is not None else (None, None)
+        json_industry, json_location = embedded.get(company_id, (None, None))
+        companies.append({
+            'name': company_name,
+            'source_url': company_url(link['href']),
+            **_build_details(industry_part or json_industry, location_part or json_location),
+        })
+
+    soup.decompose()
+    return companies
+
+
+def missing_details(company: Dict) -> List[str]:
+    """Fields that still have to come from the company's detail page"""
+    return [field for field in DETAIL_FIELDS if not company.get(field)]
+
+
+def parse_result_count(content) -> Optional[int]:
+    """Return the total number of companies reported on a listing page, if shown"""
+    soup = make_soup(content)
+    text = soup.get_text(' ')
+    soup.decompose()
+    match = RESULT_COUNT.search(text)
+    if not match:
+        return None
+    return int(match.group(1).replace(',', ''))
+
+
+def _clean(text: str) -> str:
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def _build_details(industry_part: Optional[str], location_part: Optional[str]) -> Dict:
+    details = {}
+    if industry_part and len(industry_part) > 5:
+        details['description'] = f"業種: {industry_part}"
+    if location_part and len(location_part) < 50:
+        details['location'] = location_part
+    return details
+
+
+def _parse_data_table(content) -> Dict:
+    # The header block of each company page is a small th/td table holding
+    # 業種 and 本社, so both fields come out of a single walk over its rows.
+    soup = make_soup(content, parse_only=COMPANY_DATA_TABLE)
+    industry_part = location_part = None
+
+    for th in soup.find_all('th'):
+        label = th.get_text(strip=True)
+        if label not in ('業種', '本社'):
+            continue
+        td = th.find_next_sibling('td')
+        if td is None:
+            continue
+        value = _clean(td.get_text(strip=True))
+        if label == '業種' and industry_part is None:
+            industry_part = value
+        elif label == '本社' and location_part is None:
+            location_part = value
+        if industry_part is not None and location_part is not None:
+            break
+
+    soup.decompose()
+    return _build_details(industry_part, location_part)
+
+
+def _parse_fallback(content) -> Dict:
+    # Text scan used before the data table was identified; kept for pages
+    # with a different layout. Each div's text is computed once for both labels.
+    soup = make_soup(content)
+    industry_part = location_part = None
+
+    for div in soup.find_all('div'):
+        parent = div.parent
+        if parent is None:
+            continue
+        text = div.get_text()
+        if industry_part is None and '業種' in text:
+            industry_text = parent.get_text(strip=True)
+            if '業種' in industry_text:
+                candidate = _clean(industry_text.split('業種')[1].split('本社')[0])
+                if candidate and len(candidate) > 5:
+                    industry_part = candidate
+        if location_part is None and '本社' in text:
+            location_text = parent.get_text(strip=True)
+            if '本社' in location_text:
+                candidate = _clean(location_text.split('本社')[1].split('残り採用')[0].split('直近の')[0])
+                if candidate and len(candidate) < 50:
+                    location_part = candidate
+        if industry_part is not None and location_part is not None:
+            break
+
+    soup.decompose()
+    return _build_details(industry_part, location_part)
+
+
+def parse_company_details(content) -> Dict:
+    """Extract industry (as description) and head office location from a company page"""
+    details = _parse_data_table(content)
+    if 'description' in details and 'location' in details:
+        return details
+    return {**_parse_fallback(content), **details}
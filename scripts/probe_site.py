@@ -0,0 +1,137 @@
+import argparse
+import re
+import time
+from typing import Optional
+
+import page_parser
+from http_client import fetch_content
+from page_parser import make_soup, parse_company_details, parse_company_links, parse_result_count
+
+# Query parameters tried when looking for the listing's pagination scheme
+PAGE_PARAMETERS = ('pn', 'page', 'p', 'pageNo', 'offset', 'start')
+CONTAINER_HINTS = ('company', 'corp', 'item', 'list', 'card', 'box')
+PAGINATION_TEXT = re.compile(r'次|page|ページ|→')
+
+
+def show_companies(companies, limit: int = 3):
+    print(f"Found {len(companies)} company links")
+    print(f"First {limit} companies: {[company['name'] for company in companies[:limit]]}")
+
+
+def probe_pagination(pages: int = 2, parameters=PAGE_PARAMETERS):
+    """Fetch the listing with each candidate page parameter and compare the companies returned"""
+    base = page_parser.listing_url()
+    first = parse_company_links(fetch_content(base))
+    print(f"=== {base} ===")
+    show_companies(first)
+    for parameter in parameters:
+        for page in range(2, pages + 1):
+            value = (page - 1) * len(first) if parameter in ('offset', 'start') else page
+            url = f"{base}?{parameter}={value}"
+            print(f"\n=== {url} ===")
+            try:
+                companies = parse_company_links(fetch_content(url))
+            except Exception as e:
+                print(f"Error: {e}")
+                continue
+            show_companies(companies)
+            same = {c['source_url'] for c in companies} == {c['source_url'] for c in first}
+            print("Same companies as page 1 (parameter ignored)" if same else "Different companies")
+
+
+def probe_structure():
+    """Summarize the listing page markup: result count, containers, links, embedded data"""
+    content = fetch_content(page_parser.listing_url())
+    soup = make_soup(content)
+    print("=== Page Title ===")
+    print(soup.title.get_text() if soup.title else "No title")
+    print(f"Result count: {parse_result_count(content)}")
+
+    print("\n=== Potential Company Container Classes ===")
+    for hint in CONTAINER_HINTS:
+        elements = soup.find_all(attrs={'class': lambda x: x and hint in ' '.join(x).lower()})
+        if elements:
+            print(f"Found {len(elements)} elements with '{hint}' in class, e.g. {elements[0].get('class')}")
+
+    print("\n=== Company Links ===")
+    companies = parse_company_links(content)
+    show_companies(companies, 5)
+    for company in companies[:5]:
+        print(f"  {company['source_url']}")
+
+    print("\n=== Pagination Elements ===")
+    for element in soup.find_all(['a', 'span', 'div'], string=PAGINATION_TEXT)[:5]:
+        print(f"  Link: {element['href']}" if element.get('href') else f"  Text: {element.get_text(strip=True)}")
+
+    print("\n=== Script tags (for JSON data) ===")
+    for script in soup.find_all('script'):
+        text = script.string or ''
+        if any(word in text.lower() for word in ('company', 'corp', 'page')):
+            print(f"  Found potential data in script: {text[:200]}...")
+            break
+    soup.decompose()
+
+
+def probe_details(count: int = 3, save_path: Optional[str] = None):
+    """Fetch the first companies' detail pages and show what the parser extracts.
+
+    With `save_path`, the first page is also written there. Nothing is saved
+    by default: sample_company_page.html is the fixture the benchmarks and
+    the mock server build on, and must only change deliberately.
+    """
+    companies = parse_company_links(fetch_content(page_parser.listing_url()))
+    for i, company in enumerate(companies[:count]):
+        print(f"\n=== {i + 1}: {company['name']} ===")
+        print(f"URL: {company['source_url']}")
+        try:
+            content = fetch_content(company['source_url'])
+        except Exception as e:
+            print(f"Error: {e}")
+            continue
+        text = make_soup(content).get_text()
+        for label in page_parser.INDUSTRY_LABELS + page_parser.LOCATION_LABELS:
+            print(f"'{label}' in page: {label in text}")
+        print(f"Parsed: {parse_company_details(content)}")
+        if save_path and i == 0:
+            with open(save_path, 'wb') as f:
+                f.write(content if isinstance(content, bytes) else content.encode('utf-8'))
+            print(f"Saved page to {save_path}")
+        time.sleep(1)  # Be respectful
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the live Rikunabi listing and company pages")
+    parser.add_argument('--base-url', default=None,
+                        help=f"Site root to probe (default: {page_parser.DEFAULT_BASE_URL}, or RIKUNABI_BASE_URL)")
+    parser.add_argument('--year', type=int, default=None,
+                        help=f"Graduation year (default: {page_parser.DEFAULT_YEAR}, or RIKUNABI_YEAR)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    pagination_parser = commands.add_parser('pagination', help="Find which query parameter pages the listing")
+    pagination_parser.add_argument('--pages', type=int, default=2, help="Highest page to request per parameter")
+    pagination_parser.add_argument('--parameter', action='append', choices=PAGE_PARAMETERS,
+                                   help="Only try these parameters (repeatable)")
+
+    commands.add_parser('structure', help="Summarize the listing page markup")
+
+    details_parser = commands.add_parser('details', help="Parse the first companies' detail pages")
+    details_parser.add_argument('--count', type=int, default=3)
+    details_parser.add_argument('--save', metavar='PATH', default=None,
+                                help="Also save the first page's HTML to PATH")
+    args = parser.parse_args()
+
+    if args.base_url:
+        page_parser.set_base_url(args.base_url)
+    if args.year:
+        page_parser.set_year(args.year)
+
+    if args.command == 'pagination':
+        probe_pagination(args.pages, args.parameter or PAGE_PARAMETERS)
+    elif args.command == 'structure':
+        probe_structure()
+    else:
+        probe_details(args.count, args.save)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Thread-safe token bucket that refills at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a token is available and consume it"""
+        with self.lock:
+            self._refill()
+            while self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class HostRateLimiter:
+    """Per-host politeness limiter backed by one token bucket per hostname.
+
+    acquire() blocks, so it is meant to run where the request is made (see
+    http_client.configure_throttle), which keeps cache hits unthrottled.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url: str):
+        self.bucket(url).acquire()
+
+
+class SharedRateLimiter:
+    """Blocking per-host limiter whose buckets live in a WorkQueue database.
+
+    Every worker process, on this machine or another sharing the queue file,
+    draws from the same buckets, so `rate` is a global politeness budget
+    rather than a per-process one.
+    """
+
+    def __init__(self, queue, rate: float, burst: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.queue = queue
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+
+    def acquire(self, url: str):
+        host = urlparse(url).netloc
+        while True:
+            wait = self.queue.take_token(host, self.rate, self.burst)
+            if not wait:
+                return
+            time.sleep(wait)
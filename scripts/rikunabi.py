@@ -0,0 +1,46 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+
+# Subcommand -> (module whose main() runs it, help). Modules are imported only
+# when their command runs, so `probe` or `bench` never touch Supabase and
+# `progress` (without --live-target) never loads requests or bs4.
+COMMANDS = {
+    'crawl': ('scrape_rikunabi', "Crawl the listing and company pages into Supabase or export files"),
+    'queue': ('distributed_crawl', "Seed, run or inspect the sharded multi-worker crawl"),
+    'progress': ('check_progress', "Report how many companies have been scraped"),
+    'probe': ('probe_site', "Inspect the live listing and company page markup"),
+    'bench': ('bench_scraper', "Run the offline parser and save-path benchmarks"),
+    'index': ('search_index', "Build, query or serve the local company search index"),
+    'industries': ('industry_mapping', "Normalize scraped industries and map them to industries rows"),
+    'load': ('load_companies', "Bulk load an export file into Postgres"),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rikunabi scraper tools",
+        epilog="Run '%(prog)s <command> --help' for the options of a command.",
+    )
+    parser.add_argument('--timing', action='store_true',
+                        help="Print how long the command took, including imports")
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+    for name, (_, help_text) in COMMANDS.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+    args, rest = parser.parse_known_args(argv)
+
+    start = time.perf_counter()
+    module = importlib.import_module(COMMANDS[args.command][0])
+    # The command's own parser reads sys.argv, so hand it the remaining arguments
+    sys.argv = [f"{os.path.basename(sys.argv[0])} {args.command}", *rest]
+    try:
+        module.main()
+    finally:
+        if args.timing:
+            print(f"{args.command} took {time.perf_counter() - start:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
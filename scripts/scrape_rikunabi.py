@@ -1,182 +1,611 @@
 import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
 import time
 import json
 import os
 import sys
-from typing import List, Dict
-import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 
 # Add parent directory to path to import from src
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from supabase_client import supabase
+from rate_limiter import HostRateLimiter
+from crawl_metrics import metrics, peak_rss_mb, profiler, profiled_call
+from http_client import configure_cache, configure_session, configure_throttle, fetch_content, DEFAULT_TIMEOUT
+from page_cache import PageCache, DEFAULT_TTL
+from known_companies import KnownCompanies, load_known_companies
+from change_detection import load_change_detector
+from crawl_journal import CrawlJournal, DEFAULT_MAX_ATTEMPTS, journal_path, save_listing_total
+from company_writer import CompanyWriter, DEFAULT_UPSERT_BATCH_SIZE
+from company_sinks import BufferedSink, MultiSink, open_file_sink
+from search_index import SearchIndex, update_from_database, update_from_files
+import page_parser
+from page_parser import (parse_company_links, parse_company_details, parse_listing, parse_result_count,
+                         missing_details)
 
-def scrape_company_page(page_num: int = 1) -> List[Dict]:
-    """Scrape companies from a specific page"""
-    url = f"https://job.rikunabi.com/2026/s/"
+# Defaults for the concurrent crawl mode
+DEFAULT_CONCURRENCY = 8
+# Listing pages get their own fetch workers so discovery keeps pace with details
+DEFAULT_PAGE_CONCURRENCY = 2
+DEFAULT_RATE = 2.0  # requests per second per host
+DEFAULT_BURST = 2
+DEFAULT_WRITE_QUEUE_SIZE = 1000
+# Listing and detail jobs queued or in flight before the feeder pauses; with
+# the pages being parsed this caps memory regardless of crawl size
+DEFAULT_MAX_OPEN_JOBS = 1000
+DEFAULT_METRICS_INTERVAL = 10.0
+PROFILE_STAGES = ('fetch', 'parse', 'write')
+# Used when the first listing page does not show a result count
+FALLBACK_TOTAL_COMPANIES = 11976
+FALLBACK_PAGE_SIZE = 100
+
+def fetch_company_page(page_num: int = 1, year: Optional[int] = None) -> Optional[bytes]:
+    """Download the raw HTML of a listing page"""
     params = {
         'pn': page_num
     }
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     try:
-        response = requests.get(url, params=params, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        companies = []
-        
-        # Find company profile links
-        links = soup.find_all('a', href=True)
-        company_links = [link for link in links if '/2026/company/r' in link['href'] and '/seminars/' not in link['href'] and '/entries/' not in link['href']]
-        
-        for link in company_links:
-            company_data = {}
-            
-            # Extract company name from link text
-            company_name = link.get_text(strip=True)
-            if company_name and company_name != '企業検索':
-                company_data['name'] = company_name
-                rikunabi_id = link['href'].split('/')[3]  # Extract company ID
-                company_data['source_url'] = f"https://job.rikunabi.com{link['href']}"
-                
-                companies.append(company_data)
-        
-        return companies
+        return fetch_content(page_parser.listing_url(year), params=params)
         
     except requests.RequestException as e:
         print(f"Error fetching page {page_num}: {e}")
-        return []
+        return None
 
-def scrape_company_details(company_url: str) -> Dict:
-    """Scrape detailed information from a company's profile page"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
+def fetch_company_details(company_url: str) -> Optional[bytes]:
+    """Download the raw HTML of a company's profile page"""
     try:
-        response = requests.get(company_url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        details = {}
-        
-        # Look for industry and location information in divs containing specific text
-        all_text = soup.get_text()
-        all_divs = soup.find_all('div')
-        
-        # Extract industry from divs containing '業種'
-        for div in all_divs:
-            if '業種' in div.get_text():
-                # Look for the next sibling or parent div that contains actual industry names
-                parent = div.parent
-                if parent:
-                    industry_text = parent.get_text(strip=True)
-                    # Extract just the industry part (after '業種')
-                    if '業種' in industry_text:
-                        industry_part = industry_text.split('業種')[1].split('本社')[0]
-                        industry_part = re.sub(r'\s+', ' ', industry_part).strip()
-                        if industry_part and len(industry_part) > 5:
-                            details['description'] = f"業種: {industry_part}"
-                            break
-        
-        # Extract location from divs containing '本社'
-        for div in all_divs:
-            if '本社' in div.get_text():
-                parent = div.parent
-                if parent:
-                    location_text = parent.get_text(strip=True)
-                    # Extract just the location part (after '本社')
-                    if '本社' in location_text:
-                        location_part = location_text.split('本社')[1].split('残り採用')[0].split('直近の')[0]
-                        location_part = re.sub(r'\s+', ' ', location_part).strip()
-                        if location_part and len(location_part) < 50:
-                            details['location'] = location_part
-                            break
-        
-        return details
+        return fetch_content(company_url)
         
     except requests.RequestException as e:
         print(f"Error fetching company details from {company_url}: {e}")
-        return {}
+        return None
 
-def save_companies_to_supabase(companies: List[Dict]):
-    """Save companies to Supabase with duplicate handling"""
+def scrape_company_page(page_num: int = 1, listing_only: bool = False) -> List[Dict]:
+    """Scrape companies from a specific page.
+
+    With listing_only, records also carry the industry and location shown on
+    the listing itself, so complete ones need no detail request.
+    """
+    content = fetch_company_page(page_num)
+    if not content:
+        return []
+    return parse_listing(content) if listing_only else parse_company_links(content)
+
+def scrape_company_details(company_url: str) -> Dict:
+    """Scrape detailed information from a company's profile page"""
+    content = fetch_company_details(company_url)
+    return parse_company_details(content) if content else {}
+
+def discover_pagination(year: Optional[int] = None) -> Tuple[int, int]:
+    """Read (total companies, companies per page) from the first listing page"""
+    content = fetch_company_page(1, year)
+    total = parse_result_count(content) if content else None
+    page_size = len({c['source_url'] for c in parse_company_links(content)}) if content else 0
+    if not total or not page_size:
+        print(f"Could not read pagination from the first listing page; assuming "
+              f"{FALLBACK_TOTAL_COMPANIES} companies, {FALLBACK_PAGE_SIZE} per page")
+        return FALLBACK_TOTAL_COMPANIES, FALLBACK_PAGE_SIZE
+    try:
+        save_listing_total(total, page_size, year or page_parser.YEAR)
+    except OSError as e:
+        print(f"Could not save the listing size: {e}")
+    return total, page_size
+
+class EmptyListingPage(Exception):
+    """A listing page within the counted listing came back without companies"""
+
+
+def listing_end(journal: CrawlJournal, page: int, companies: List[Dict], last_page: int,
+                total_pages: int, page_size: Optional[int] = None) -> int:
+    """Return the last listing page to crawl after parsing `page`.
+
+    An empty page within the `total_pages` the listing counted is most likely
+    a transient bad response, so EmptyListingPage is raised and the page is
+    retried like a failed fetch. An empty page past the count simply ends a
+    listing that had grown. With `page_size`, a full last page means
+    companies were added since the count was read, so one more page is
+    registered.
+    """
+    found = len({company['source_url'] for company in companies})
+    if not found:
+        if page <= total_pages:
+            raise EmptyListingPage(f"listing page {page} is empty")
+        return last_page
+    if page_size and page == last_page and found >= page_size:
+        journal.seed_pages(page + 1, page + 1)
+        print(f"Page {page} is full; the listing grew, adding page {page + 1}")
+        return page + 1
+    return last_page
+
+def save_companies_to_supabase(companies: List[Dict], update_existing: bool = False):
+    """Save companies to Supabase with bulk upserts keyed on name"""
     if not companies:
         return
     
-    saved_count = 0
+    with CompanyWriter(batch_size=len(companies), update_existing=update_existing) as writer:
+        writer.extend(companies)
+
+def companies_to_fetch(journal: CrawlJournal, page: int, companies: List[Dict],
+                       known: Optional[KnownCompanies] = None) -> List[Dict]:
+    """Record a parsed listing page and return the companies whose details still need fetching"""
+    # The journal drops companies already seen on another page
+    companies = journal.page_done(page, companies)
+    if known is None:
+        return companies
+    
+    to_fetch, fresh = known.partition(companies)
+    if fresh:
+        journal.details_skipped(fresh)
+        print(f"  Skipping {len(fresh)} companies already up to date")
+    return to_fetch
+
+def split_complete(journal: CrawlJournal, companies: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """Split listing records into (complete, needing details); complete ones are journaled as parsed"""
+    complete, incomplete = [], []
     for company in companies:
-        try:
-            # Check if company already exists
-            existing = supabase.table('companies').select('id').eq('name', company['name']).execute()
+        (incomplete if missing_details(company) else complete).append(company)
+    for record in complete:
+        journal.detail_parsed(record['source_url'], record)
+    if complete:
+        metrics.inc('details_from_listing_total', len(complete))
+        print(f"  {len(complete)} companies complete from the listing, {len(incomplete)} need detail pages")
+    return complete, incomplete
+
+async def crawl_async(journal: CrawlJournal, writer: BufferedSink, total_pages: int,
+                      concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE,
+                      burst: float = DEFAULT_BURST, timeout=DEFAULT_TIMEOUT,
+                      parse_workers: Optional[int] = None,
+                      known: Optional[KnownCompanies] = None, listing_only: bool = False,
+                      page_size: Optional[int] = None,
+                      page_concurrency: int = DEFAULT_PAGE_CONCURRENCY):
+    """Crawl listing and detail pages as a fetch -> parse -> write pipeline.
+
+    Fetch workers download raw pages under a per-host token bucket and hand
+    the bytes to a process pool for parsing, so HTML parsing scales with CPU
+    cores instead of contending for the GIL. Parsed rows go to a single
+    writer task. The parse and write queues are bounded so a slow stage
+    applies backpressure instead of buffering pages in memory, and a feeder
+    streams work from the journal only while fewer than
+    DEFAULT_MAX_OPEN_JOBS jobs are open, so peak memory does not grow with
+    the size of the crawl.
+
+    Work comes from the crawl journal: pending listing pages plus detail
+    pages discovered but not yet scraped. Listing pages have their own
+    `page_concurrency` fetch workers, so they are fetched concurrently
+    instead of waiting behind a backlog of detail pages. Failed jobs are
+    retried with the journal's backoff until their attempts are exhausted.
+    When `known` is given, only companies missing from the database (or
+    stale) get their details fetched.
+    With listing_only, companies whose industry and location appear on the
+    listing page are written straight away and never get a detail request.
+    An empty listing page is retried, and a full last page queues the next
+    (see listing_end).
+    """
+    loop = asyncio.get_running_loop()
+    configure_session(pool_size=concurrency + page_concurrency, timeout=timeout)
+    # Taken in the fetch threads just before a network request, so cached
+    # pages are not held to the politeness rate
+    configure_throttle(HostRateLimiter(rate, burst).acquire)
+    parse_workers = parse_workers or os.cpu_count() or 1
+    fetch_executor = ThreadPoolExecutor(max_workers=concurrency)
+    page_executor = ThreadPoolExecutor(max_workers=page_concurrency)
+    # A single thread keeps batch upserts off the event loop and in order
+    write_executor = ThreadPoolExecutor(max_workers=1)
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers)
+
+    page_jobs: asyncio.Queue = asyncio.Queue()
+    detail_jobs: asyncio.Queue = asyncio.Queue()
+    parse_queue: asyncio.Queue = asyncio.Queue(maxsize=parse_workers * 2)
+    write_queue: asyncio.Queue = asyncio.Queue(maxsize=DEFAULT_WRITE_QUEUE_SIZE)
+    retries = set()
+    last_page = total_pages
+    open_jobs = 0
+    room = asyncio.Event()
+    room.set()
+
+    def add_job(kind: str, item):
+        nonlocal open_jobs
+        open_jobs += 1
+        if open_jobs >= DEFAULT_MAX_OPEN_JOBS:
+            room.clear()
+        jobs_for(kind).put_nowait((kind, item))
+
+    def jobs_for(kind: str) -> asyncio.Queue:
+        return page_jobs if kind == 'page' else detail_jobs
+
+    def job_done(kind: str):
+        nonlocal open_jobs
+        open_jobs -= 1
+        if open_jobs < DEFAULT_MAX_OPEN_JOBS:
+            room.set()
+        jobs_for(kind).task_done()
+
+    async def feeder():
+        # Companies discovered before an interruption, then the listing pages
+        for company in journal.pending_details():
+            await room.wait()
+            add_job('company', company)
+        for page in journal.pending_pages():
+            if page > last_page:
+                break
+            await room.wait()
+            add_job('page', page)
+
+    async def parse(kind: str, content: bytes):
+        if kind == 'page':
+            fn = parse_listing if listing_only else parse_company_links
+        else:
+            fn = parse_company_details
+        with metrics.timer('parse_seconds', kind=kind):
+            if not profiler.enabled('parse'):
+                return await loop.run_in_executor(parse_pool, fn, content)
+            result, raw_stats = await loop.run_in_executor(parse_pool, profiled_call, fn, content)
+        profiler.add('parse', raw_stats)
+        return result
+
+    async def monitor():
+        while True:
+            metrics.set('queue_depth', page_jobs.qsize() + detail_jobs.qsize(), queue='jobs')
+            metrics.set('queue_depth', parse_queue.qsize(), queue='parse')
+            metrics.set('queue_depth', write_queue.qsize(), queue='write')
+            metrics.set('queue_depth', len(writer.buffer), queue='writer_buffer')
+            metrics.set('open_jobs', open_jobs)
+            metrics.set('peak_rss_mb', peak_rss_mb())
+            await asyncio.sleep(1)
+
+    async def requeue(kind: str, item, delay: float):
+        await asyncio.sleep(delay)
+        jobs_for(kind).put_nowait((kind, item))
+        # Only release the failed job once its retry is queued, so join()
+        # cannot return while a retry is still waiting
+        jobs_for(kind).task_done()
+
+    def failed(kind: str, item, error: str):
+        if kind == 'page':
+            delay = journal.page_failed(item, error)
+        else:
+            delay = journal.detail_failed(item['source_url'], error)
+        if delay is None:
+            print(f"Giving up on {kind} {item}: {error}")
+            job_done(kind)
+            return
+        task = asyncio.create_task(requeue(kind, item, delay))
+        retries.add(task)
+        task.add_done_callback(retries.discard)
+
+    async def fetcher(jobs: asyncio.Queue, executor: ThreadPoolExecutor):
+        while True:
+            kind, item = await jobs.get()
+            if kind == 'page' and item > last_page:
+                # Registered by an earlier run whose listing had grown further
+                job_done(kind)
+                continue
+            try:
+                if kind == 'page':
+                    print(f"Scraping page {item}/{last_page}...")
+                    content = await loop.run_in_executor(executor, profiler.call, 'fetch',
+                                                         fetch_company_page, item)
+                else:
+                    print(f"  Getting details for {item['name']}...")
+                    content = await loop.run_in_executor(executor, profiler.call, 'fetch',
+                                                         fetch_company_details, item['source_url'])
+            except Exception as e:
+                failed(kind, item, str(e))
+                continue
+
+            if content is None:
+                failed(kind, item, 'fetch failed')
+                continue
+            metrics.inc('pages_fetched_total', kind=kind)
+            # The job is only marked done once its page has been parsed, so
+            # page_jobs.join() also waits for detail jobs discovered by parsing.
+            await parse_queue.put((kind, item, content))
+
+    async def parser():
+        nonlocal last_page
+        while True:
+            kind, item, content = await parse_queue.get()
+            try:
+                if kind == 'page':
+                    companies = await parse(kind, content)
+                    end = listing_end(journal, item, companies, last_page, total_pages, page_size)
+                    if end > last_page:
+                        add_job('page', end)
+                    last_page = end
+                    companies = companies_to_fetch(journal, item, companies, known)
+                    complete, companies = split_complete(journal, companies)
+                    for company in companies:
+                        add_job('company', company)
+                    for record in complete:
+                        await write_queue.put(record)
+                else:
+                    details = await parse(kind, content)
+                    record = {**item, **details}
+                    journal.detail_parsed(item['source_url'], record)
+                    await write_queue.put(record)
+                job_done(kind)
+            except Exception as e:
+                print(f"Error parsing {kind} {item}: {e}")
+                failed(kind, item, str(e))
+            finally:
+                parse_queue.task_done()
+
+    async def saver():
+        while True:
+            company = await write_queue.get()
+            try:
+                await loop.run_in_executor(write_executor, profiler.call, 'write', writer.add, company)
+            except Exception as e:
+                print(f"Error saving company '{company.get('name', 'Unknown')}': {e}")
+            finally:
+                write_queue.task_done()
+
+    tasks = [asyncio.create_task(fetcher(detail_jobs, fetch_executor)) for _ in range(concurrency)]
+    tasks += [asyncio.create_task(fetcher(page_jobs, page_executor)) for _ in range(page_concurrency)]
+    tasks += [asyncio.create_task(parser()) for _ in range(parse_workers)]
+    tasks.append(asyncio.create_task(saver()))
+    tasks.append(asyncio.create_task(monitor()))
+    feed = asyncio.create_task(feeder())
+    tasks.append(feed)
+    try:
+        # join() only means something once the feeder has queued everything;
+        # detail jobs are all queued by the time the last page is parsed
+        await feed
+        await page_jobs.join()
+        await detail_jobs.join()
+        await write_queue.join()
+    finally:
+        for task in tasks + list(retries):
+            task.cancel()
+        await asyncio.gather(*tasks, *retries, return_exceptions=True)
+        fetch_executor.shutdown()
+        page_executor.shutdown()
+        write_executor.shutdown()
+        parse_pool.shutdown()
+
+def scrape_detail_serial(journal: CrawlJournal, writer: BufferedSink, company: Dict):
+    """Scrape one company page and hand the merged record to the writer"""
+    print(f"  Getting details for {company['name']}...")
+    
+    content = profiler.call('fetch', fetch_company_details, company['source_url'])
+    if content is None:
+        journal.detail_failed(company['source_url'], 'fetch failed')
+        return
+    metrics.inc('pages_fetched_total', kind='company')
+    
+    # Merge basic info with details
+    with metrics.timer('parse_seconds', kind='company'):
+        details = profiler.call('parse', parse_company_details, content)
+    record = {**company, **details}
+    journal.detail_parsed(company['source_url'], record)
+    profiler.call('write', writer.add, record)
+
+def crawl_serial(journal: CrawlJournal, writer: BufferedSink, total_pages: int,
+                 known: Optional[KnownCompanies] = None, listing_only: bool = False,
+                 page_size: Optional[int] = None):
+    """Crawl one request at a time (original behaviour).
+
+    Requests are spaced by the throttle main() configures, so pages served
+    from the cache are not delayed.
+
+    Failed pages stay pending in the journal and are retried on the next run.
+    """
+    # Companies discovered before an interruption but never scraped
+    for company in journal.pending_details():
+        scrape_detail_serial(journal, writer, company)
+    
+    pages = journal.pending_pages()
+    last_page = total_pages
+    while pages:
+        page = pages.pop(0)
+        if page > last_page:
+            break
+        print(f"Scraping page {page}/{last_page}...")
+        
+        content = profiler.call('fetch', fetch_company_page, page)
+        if content is None:
+            journal.page_failed(page, 'fetch failed')
+        else:
+            metrics.inc('pages_fetched_total', kind='page')
+            with metrics.timer('parse_seconds', kind='page'):
+                companies = profiler.call('parse', parse_listing if listing_only else parse_company_links,
+                                          content)
+            try:
+                end = listing_end(journal, page, companies, last_page, total_pages, page_size)
+            except EmptyListingPage as e:
+                print(f"Error parsing page {page}: {e}")
+                journal.page_failed(page, str(e))
+                continue
+            if end > last_page:
+                pages.append(end)
+            last_page = end
+            companies = companies_to_fetch(journal, page, companies, known)
+            complete, companies = split_complete(journal, companies)
+            writer.extend(complete)
             
-            if not existing.data:
-                # Company doesn't exist, insert it
-                result = supabase.table('companies').insert(company).execute()
-                saved_count += 1
-            else:
-                print(f"Company '{company['name']}' already exists, skipping")
-                
-        except Exception as e:
-            print(f"Error saving company '{company.get('name', 'Unknown')}': {e}")
-    
-    if saved_count > 0:
-        print(f"Saved {saved_count} new companies to database")
+            for company in companies:
+                scrape_detail_serial(journal, writer, company)
 
 def main():
     """Main scraping function"""
-    total_companies = 11976
-    companies_per_page = 100
-    total_pages = (total_companies + companies_per_page - 1) // companies_per_page
-    start_page = 46  # Resume from page 46 (around 4500 companies)
+    parser = argparse.ArgumentParser(description="Scrape companies from Rikunabi")
+    parser.add_argument('--start-page', type=int, default=1,
+                        help="First listing page to crawl")
+    parser.add_argument('--end-page', type=int, default=None,
+                        help="Last listing page to crawl (default: all pages)")
+    parser.add_argument('--journal', default=None,
+                        help="SQLite file recording crawl progress for resuming "
+                             "(default: rikunabi_crawl.db, or rikunabi_crawl_<year>.db for other years)")
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Attempts per page before it is marked failed")
+    parser.add_argument('--restart', action='store_true',
+                        help="Discard the journal and crawl every page again")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only fetch details for companies not already in the database")
+    parser.add_argument('--refresh-days', type=float, default=None,
+                        help="With --incremental, also refetch companies not updated for this many days")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="Retry pages marked failed by earlier runs, and pages earlier versions "
+                             "skipped after an empty listing page")
+    parser.add_argument('--serial', action='store_true',
+                        help="Fetch one page at a time, spaced 1/--rate seconds apart")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="Maximum number of detail page requests in flight")
+    parser.add_argument('--page-concurrency', type=int, default=DEFAULT_PAGE_CONCURRENCY,
+                        help="Maximum number of listing page requests in flight")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help="Requests per second allowed per host")
+    parser.add_argument('--burst', type=float, default=DEFAULT_BURST,
+                        help="Token bucket capacity per host")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_UPSERT_BATCH_SIZE,
+                        help="Companies sent per bulk upsert")
+    parser.add_argument('--update-existing', action='store_true',
+                        help="Overwrite companies that already exist instead of skipping them")
+    parser.add_argument('--detect-changes', action='store_true',
+                        help="Only write companies whose scraped content differs from the stored row")
+    parser.add_argument('--change-log', default=None,
+                        help="With --detect-changes, JSONL file listing new and changed companies "
+                             "(default: changes-<timestamp>.jsonl)")
+    parser.add_argument('--export', action='append', default=[],
+                        help="Also stream records to a .jsonl or .parquet file (repeatable)")
+    parser.add_argument('--no-db', action='store_true',
+                        help="Only write to the --export files, not to Supabase")
+    parser.add_argument('--search-index', default=None,
+                        help="After the crawl, bring this local search index up to date "
+                             "(see search_index.py)")
+    parser.add_argument('--listing-only', action='store_true',
+                        help="Take industry and location from listing pages; only fetch detail pages "
+                             "for companies missing them")
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help="Parser processes (default: number of CPU cores)")
+    parser.add_argument('--cache-dir', default=os.environ.get('RIKUNABI_CACHE_DIR'),
+                        help="Directory for the compressed raw page cache (disabled if unset)")
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL,
+                        help="Seconds a cached page is served before it is revalidated")
+    parser.add_argument('--offline', action='store_true',
+                        help="Serve pages only from the cache, never from the network")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve Prometheus metrics on this port")
+    parser.add_argument('--metrics-json', default=None,
+                        help="Periodically write a JSON metrics snapshot to this file")
+    parser.add_argument('--metrics-interval', type=float, default=DEFAULT_METRICS_INTERVAL,
+                        help="Seconds between JSON metrics snapshots")
+    parser.add_argument('--profile', action='append', choices=PROFILE_STAGES, default=[],
+                        help="Collect a cProfile of a stage into profile_<stage>.prof (repeatable)")
+    parser.add_argument('--year', type=int, default=None,
+                        help=f"Graduation year to crawl (default: {page_parser.DEFAULT_YEAR}, or RIKUNABI_YEAR)")
+    parser.add_argument('--base-url', default=None,
+                        help=f"Site root to crawl (default: {page_parser.DEFAULT_BASE_URL}, or RIKUNABI_BASE_URL)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT[1],
+                        help="Read timeout in seconds for each request")
+    args = parser.parse_args()
+
+    timeout = (DEFAULT_TIMEOUT[0], args.timeout)
+    if args.base_url:
+        page_parser.set_base_url(args.base_url)
+    if args.year:
+        page_parser.set_year(args.year)
+    if args.cache_dir:
+        configure_cache(PageCache(args.cache_dir, ttl=args.cache_ttl, offline=args.offline))
+    elif args.offline:
+        parser.error("--offline requires --cache-dir")
     
-    print(f"Resuming scraping from page {start_page}/{total_pages}")
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        print(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+    stop_reporter = None
+    if args.metrics_json:
+        stop_reporter = metrics.start_json_reporter(args.metrics_json, args.metrics_interval)
+    profiler.stages.update(args.profile)
     
-    all_companies = []
+    # The listing's real size decides the page range unless --end-page pins it
+    page_size = None
+    end_page = args.end_page
+    if end_page is None:
+        total_companies, page_size = discover_pagination()
+        end_page = (total_companies + page_size - 1) // page_size
+        print(f"Listing has {total_companies} companies, {page_size} per page: {end_page} pages")
     
-    for page in range(start_page, total_pages + 1):
-        print(f"Scraping page {page}/{total_pages}...")
-        
-        companies = scrape_company_page(page)
-        
-        if companies:
-            # Enhance companies with detailed information
-            enhanced_companies = []
-            for company in companies:
-                print(f"  Getting details for {company['name']}...")
-                
-                # Get detailed information
-                details = scrape_company_details(company['source_url'])
-                
-                # Merge basic info with details
-                enhanced_company = {**company, **details}
-                enhanced_companies.append(enhanced_company)
-                
-                # Small delay between detail requests
-                time.sleep(0.5)
-            
-            all_companies.extend(enhanced_companies)
-            
-            # Save in batches of 20 companies (smaller batches due to detailed scraping)
-            if len(all_companies) >= 20:
-                save_companies_to_supabase(all_companies)
-                all_companies = []
-        
-        # Be respectful with delays
-        time.sleep(1)
+    args.journal = args.journal or journal_path(page_parser.YEAR, page_parser.DEFAULT_YEAR)
+    journal = CrawlJournal(args.journal, max_attempts=args.max_attempts)
+    if args.restart:
+        journal.reset()
+    other_year = journal.claim_year(page_parser.YEAR)
+    if other_year is not None:
+        parser.error(f"{args.journal} tracks the {other_year} listing; pass --journal for "
+                     f"{page_parser.YEAR} or --restart to discard it")
+    journal.seed_pages(args.start_page, end_page)
+    if args.retry_failed:
+        journal.retry_failed()
+    
+    pending_pages = journal.pending_pages()
+    print(f"Resuming from {args.journal}: {len(pending_pages)} of {end_page - args.start_page + 1} "
+          f"pages and {journal.count_details('pending')} companies pending")
+    
+    known = None
+    update_existing = args.update_existing
+    if args.incremental:
+        known = load_known_companies(refresh_days=args.refresh_days, checked=journal.checked_times())
+        print(f"Loaded {len(known)} known companies")
+        # Stale rows are only refreshed if the upsert overwrites them
+        update_existing = update_existing or args.refresh_days is not None
+    elif args.refresh_days is not None:
+        parser.error("--refresh-days requires --incremental")
+    if args.no_db and not args.export:
+        parser.error("--no-db requires --export")
+    detector = None
+    if args.detect_changes:
+        if args.no_db:
+            parser.error("--detect-changes compares against the database and cannot be used with --no-db")
+        change_log = args.change_log or f"changes-{time.strftime('%Y%m%d-%H%M%S')}.jsonl"
+        detector = load_change_detector(log_path=change_log)
+        print(f"Loaded content hashes for {len(detector)} companies")
+    
+    sinks = []
+    if not args.no_db:
+        sinks.append(CompanyWriter(batch_size=args.batch_size, update_existing=update_existing,
+                                   detector=detector))
+    for path in args.export:
+        sinks.append(open_file_sink(path))
+    
+    # Records count as saved once every sink has written them. Leaving the
+    # with-block flushes the final partial batch, even on Ctrl-C
+    with MultiSink(sinks, on_write=journal.records_saved) as writer:
+        # Records scraped before an interruption but never written
+        writer.extend(journal.unsaved_records())
         
-        # Full scraping enabled
+        if args.serial:
+            configure_session(timeout=timeout)
+            # No bursts: one request every 1/rate seconds, like the old fixed sleeps
+            configure_throttle(HostRateLimiter(args.rate, 1).acquire)
+            crawl_serial(journal, writer, end_page, known, args.listing_only, page_size)
+        else:
+            asyncio.run(crawl_async(journal, writer, end_page, args.concurrency,
+                                    args.rate, args.burst, timeout, args.parse_workers, known,
+                                    args.listing_only, page_size, args.page_concurrency))
+    
+    print(f"Journal status: {journal.summary()}")
+    journal.close()
+    
+    if args.search_index:
+        index = SearchIndex(args.search_index)
+        if args.no_db:
+            count = update_from_files(index, args.export)
+        else:
+            count = update_from_database(index)
+        print(f"Search index {args.search_index}: {count} companies updated, {len(index)} total")
+        index.close()
     
-    # Save remaining companies
-    if all_companies:
-        save_companies_to_supabase(all_companies)
+    if stop_reporter:
+        stop_reporter.set()
+    profiler.dump()
+    snapshot = metrics.snapshot()
+    print(f"Throughput: {snapshot['rates_per_second']}")
     
     print("Scraping completed!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,343 @@
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from change_detection import normalize
+
+DEFAULT_INDEX_PATH = 'companies_search.db'
+DEFAULT_PORT = 8766
+DEFAULT_LIMIT = 10
+# The trigram tokenizer cannot match anything shorter; such queries use a name prefix scan
+TRIGRAM = 3
+# Bump when SCHEMA changes; an index with another version is dropped and rebuilt
+SCHEMA_VERSION = '2'
+COLUMNS = ('id', 'name', 'source_url', 'description', 'location', 'employee_count', 'industry_id',
+           'industry_text', 'updated_at')
+# Same fields as /api/companies/search returns, plus what the index adds
+RESULT_COLUMNS = ('id', 'name', 'source_url', 'description', 'location', 'employee_count', 'industry_text')
+DATABASE_COLUMNS = ', '.join(COLUMNS + ('name_kana',))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    id TEXT,
+    name TEXT PRIMARY KEY,
+    source_url TEXT,
+    description TEXT,
+    location TEXT,
+    employee_count TEXT,
+    industry_id TEXT,
+    industry_text TEXT,
+    updated_at TEXT,
+    name_key TEXT NOT NULL,
+    romaji_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_companies_name_key ON companies(name_key);
+CREATE INDEX IF NOT EXISTS idx_companies_romaji_key ON companies(romaji_key);
+CREATE INDEX IF NOT EXISTS idx_companies_industry_id ON companies(industry_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS companies_fts USING fts5(
+    name_key, romaji_key, body, tokenize = 'trigram'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Hepburn romanisation of hiragana; digraphs are listed before single kana
+ROMAJI = {
+    'きゃ': 'kya', 'きゅ': 'kyu', 'きょ': 'kyo', 'しゃ': 'sha', 'しゅ': 'shu', 'しょ': 'sho',
+    'ちゃ': 'cha', 'ちゅ': 'chu', 'ちょ': 'cho', 'にゃ': 'nya', 'にゅ': 'nyu', 'にょ': 'nyo',
+    'ひゃ': 'hya', 'ひゅ': 'hyu', 'ひょ': 'hyo', 'みゃ': 'mya', 'みゅ': 'myu', 'みょ': 'myo',
+    'りゃ': 'rya', 'りゅ': 'ryu', 'りょ': 'ryo', 'ぎゃ': 'gya', 'ぎゅ': 'gyu', 'ぎょ': 'gyo',
+    'じゃ': 'ja', 'じゅ': 'ju', 'じょ': 'jo', 'びゃ': 'bya', 'びゅ': 'byu', 'びょ': 'byo',
+    'ぴゃ': 'pya', 'ぴゅ': 'pyu', 'ぴょ': 'pyo', 'ふぁ': 'fa', 'ふぃ': 'fi', 'ふぇ': 'fe', 'ふぉ': 'fo',
+    'てぃ': 'ti', 'でぃ': 'di', 'うぃ': 'wi', 'うぇ': 'we', 'ゔぁ': 'va', 'しぇ': 'she', 'じぇ': 'je',
+    'ちぇ': 'che',
+    'あ': 'a', 'い': 'i', 'う': 'u', 'え': 'e', 'お': 'o',
+    'か': 'ka', 'き': 'ki', 'く': 'ku', 'け': 'ke', 'こ': 'ko',
+    'さ': 'sa', 'し': 'shi', 'す': 'su', 'せ': 'se', 'そ': 'so',
+    'た': 'ta', 'ち': 'chi', 'つ': 'tsu', 'て': 'te', 'と': 'to',
+    'な': 'na', 'に': 'ni', 'ぬ': 'nu', 'ね': 'ne', 'の': 'no',
+    'は': 'ha', 'ひ': 'hi', 'ふ': 'fu', 'へ': 'he', 'ほ': 'ho',
+    'ま': 'ma', 'み': 'mi', 'む': 'mu', 'め': 'me', 'も': 'mo',
+    'や': 'ya', 'ゆ': 'yu', 'よ': 'yo',
+    'ら': 'ra', 'り': 'ri', 'る': 'ru', 'れ': 're', 'ろ': 'ro',
+    'わ': 'wa', 'ゐ': 'i', 'ゑ': 'e', 'を': 'o', 'ん': 'n',
+    'が': 'ga', 'ぎ': 'gi', 'ぐ': 'gu', 'げ': 'ge', 'ご': 'go',
+    'ざ': 'za', 'じ': 'ji', 'ず': 'zu', 'ぜ': 'ze', 'ぞ': 'zo',
+    'だ': 'da', 'ぢ': 'ji', 'づ': 'zu', 'で': 'de', 'ど': 'do',
+    'ば': 'ba', 'び': 'bi', 'ぶ': 'bu', 'べ': 'be', 'ぼ': 'bo',
+    'ぱ': 'pa', 'ぴ': 'pi', 'ぷ': 'pu', 'ぺ': 'pe', 'ぽ': 'po',
+    'ぁ': 'a', 'ぃ': 'i', 'ぅ': 'u', 'ぇ': 'e', 'ぉ': 'o', 'ゃ': 'ya', 'ゅ': 'yu', 'ょ': 'yo', 'ゔ': 'vu',
+}
+KANA_TOKEN = re.compile('|'.join(sorted(ROMAJI, key=len, reverse=True)) + '|っ|ー|.', re.S)
+KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord('ァ'), ord('ヶ') + 1)}
+
+
+def fold(text: Optional[str]) -> str:
+    """Search key: NFKC (full/half width folded), lower case, katakana as hiragana"""
+    return normalize(text).lower().translate(KATAKANA_TO_HIRAGANA)
+
+
+def romaji(text: str) -> str:
+    """Romanise the kana in an already folded string; other characters are kept as they are"""
+    out: List[str] = []
+    double_next = False
+    for token in KANA_TOKEN.findall(text):
+        if token == 'っ':
+            double_next = True
+            continue
+        if token == 'ー':
+            # Long vowel mark repeats the previous vowel
+            if out and out[-1][-1:] in 'aeiou':
+                out.append(out[-1][-1])
+            continue
+        roman = ROMAJI.get(token, token)
+        if double_next and roman[:1].isalpha() and roman[:1] not in 'aeiou':
+            roman = roman[0] + roman
+        double_next = False
+        out.append(roman)
+    return ''.join(out)
+
+
+def _like_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _phrase(query: str) -> str:
+    # Quote the query so FTS5 treats punctuation in it as literal text
+    return '"' + query.replace('"', '""') + '"'
+
+
+class SearchIndex:
+    """SQLite FTS5 (trigram) index of companies for local autocomplete.
+
+    Names are matched on a folded key (width, case and katakana/hiragana
+    insensitive) and on its romanisation, so "テスト", "てすと", "ﾃｽﾄ" and
+    "tesuto" find the same company. Description, location and industry are
+    searchable through the body column. Romanisation only covers kana;
+    kanji names need name_kana to be found in romaji.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        if self.get_meta('schema_version') != SCHEMA_VERSION:
+            # The index is derived data: rebuild rather than migrate
+            self.conn.executescript("DROP TABLE IF EXISTS companies; DROP TABLE IF EXISTS companies_fts; "
+                                    "DELETE FROM meta;")
+            self.set_meta('schema_version', SCHEMA_VERSION)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM companies")
+            self.conn.execute("DELETE FROM companies_fts")
+            self.conn.execute("DELETE FROM meta WHERE key <> 'schema_version'")
+
+    def upsert(self, rows: Iterable[Dict]) -> int:
+        """Add or replace companies by name; returns how many were written"""
+        count = 0
+        with self.lock, self.conn:
+            for row in rows:
+                name = row.get('name')
+                if not name:
+                    continue
+                name_key = fold(name)
+                romaji_key = romaji(fold(row.get('name_kana')) or name_key)
+                body = fold(' '.join(filter(None, (row.get('description'), row.get('location'),
+                                                   row.get('industry_text')))))
+                previous = self.conn.execute("SELECT rowid FROM companies WHERE name = ?", (name,)).fetchone()
+                if previous:
+                    self.conn.execute("DELETE FROM companies_fts WHERE rowid = ?", previous)
+                    self.conn.execute("DELETE FROM companies WHERE rowid = ?", previous)
+                cursor = self.conn.execute(
+                    f"INSERT INTO companies ({', '.join(COLUMNS)}, name_key, romaji_key) "
+                    f"VALUES ({', '.join('?' * (len(COLUMNS) + 2))})",
+                    (*(row.get(column) for column in COLUMNS), name_key, romaji_key),
+                )
+                self.conn.execute(
+                    "INSERT INTO companies_fts (rowid, name_key, romaji_key, body) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, name_key, romaji_key, body),
+                )
+                count += 1
+        return count
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, industry_id: Optional[str] = None) -> List[Dict]:
+        """Companies matching `query`, name prefix matches first.
+
+        Queries of three or more characters go through the trigram index;
+        shorter ones (二文字 kanji words are common) fall back to a LIKE scan.
+        """
+        key = fold(query)
+        if not key:
+            return []
+        roman = romaji(key)
+        prefix = _like_escape(key) + '%'
+        industry_filter = "AND c.industry_id = ? " if industry_id else ""
+        industry_params = (industry_id,) if industry_id else ()
+        with self.lock:
+            if len(key) < TRIGRAM:
+                # A local table of ~10k rows scans in a few milliseconds
+                rows = self.conn.execute(
+                    f"SELECT {', '.join('c.' + column for column in RESULT_COLUMNS)} "
+                    "FROM companies_fts f JOIN companies c ON c.rowid = f.rowid "
+                    "WHERE (f.name_key LIKE ? ESCAPE '\\' OR f.body LIKE ? ESCAPE '\\' "
+                    "OR (c.romaji_key >= ? AND c.romaji_key < ?)) "
+                    f"{industry_filter}"
+                    "ORDER BY c.name_key LIKE ? ESCAPE '\\' DESC, f.name_key LIKE ? ESCAPE '\\' DESC, "
+                    "length(c.name) LIMIT ?",
+                    ('%' + prefix, '%' + prefix, roman, roman + '\uffff', *industry_params,
+                     prefix, '%' + prefix, limit),
+                ).fetchall()
+            else:
+                match = f"({{name_key body}} : {_phrase(key)})"
+                if len(roman) >= TRIGRAM:
+                    match += f" OR (romaji_key : {_phrase(roman)})"
+                rows = self.conn.execute(
+                    f"SELECT {', '.join('c.' + column for column in RESULT_COLUMNS)} "
+                    "FROM companies_fts f JOIN companies c ON c.rowid = f.rowid "
+                    "WHERE companies_fts MATCH ? "
+                    f"{industry_filter}"
+                    "ORDER BY c.name_key LIKE ? ESCAPE '\\' DESC, bm25(companies_fts, 10.0, 5.0, 1.0) "
+                    "LIMIT ?",
+                    (match, *industry_params, prefix, limit),
+                ).fetchall()
+        return [dict(zip(RESULT_COLUMNS, row)) for row in rows]
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+
+
+def update_from_database(index: SearchIndex, client=None, full: bool = False) -> int:
+    """Index companies updated in Supabase since the last run (all of them with `full`)"""
+    from known_companies import fetch_all_rows
+
+    if full:
+        index.clear()
+    since = index.get_meta('synced_updated_at')
+    rows = fetch_all_rows(DATABASE_COLUMNS, client, updated_since=since)
+    count = index.upsert(rows)
+    latest = max((row['updated_at'] for row in rows if row.get('updated_at')), default=since)
+    if latest:
+        index.set_meta('synced_updated_at', latest)
+    return count
+
+
+def update_from_files(index: SearchIndex, paths: List[str]) -> int:
+    """Index the records of JSONL/Parquet exports"""
+    from company_sinks import iter_record_batches
+
+    return sum(index.upsert(batch) for path in paths for batch in iter_record_batches(path))
+
+
+def serve(index: SearchIndex, port: int = DEFAULT_PORT, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Serve GET /search?q=...&limit=...&industry_id=... as JSON from a daemon thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def respond(self, status: int, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/search':
+                self.respond(404, {'error': 'not found'})
+                return
+            params = parse_qs(url.query)
+            try:
+                limit = int(params.get('limit', [''])[0] or DEFAULT_LIMIT)
+            except ValueError:
+                self.respond(400, {'error': 'limit must be an integer'})
+                return
+            results = index.search(params.get('q', [''])[0], max(1, min(limit, 100)),
+                                   params.get('industry_id', [None])[0])
+            self.respond(200, results)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local full-text search index of scraped companies")
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help="SQLite file holding the index")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help="Add companies changed since the last build")
+    build_parser.add_argument('--full', action='store_true',
+                              help="Rebuild from scratch, dropping companies deleted upstream")
+    build_parser.add_argument('--from-file', action='append', default=[],
+                              help="Index a JSONL/Parquet export instead of the database (repeatable)")
+
+    query_parser = commands.add_parser('query', help="Run one search and print the results")
+    query_parser.add_argument('text')
+    query_parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+    query_parser.add_argument('--industry-id', default=None)
+
+    serve_parser = commands.add_parser('serve', help="Answer /search?q= requests over HTTP")
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    if args.command == 'build':
+        start = time.perf_counter()
+        if args.from_file:
+            if args.full:
+                index.clear()
+            count = update_from_files(index, args.from_file)
+        else:
+            count = update_from_database(index, full=args.full)
+        print(f"Indexed {count} companies in {time.perf_counter() - start:.1f}s; "
+              f"{len(index)} in {args.index}")
+    elif args.command == 'query':
+        start = time.perf_counter()
+        results = index.search(args.text, args.limit, args.industry_id)
+        elapsed = (time.perf_counter() - start) * 1000
+        for result in results:
+            print(json.dumps(result, ensure_ascii=False))
+        print(f"{len(results)} results in {elapsed:.2f} ms")
+    else:
+        server = serve(index, args.port, args.host)
+        print(f"Serving search on http://{args.host}:{args.port}/search?q=")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,41 @@
 import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import threading
+from typing import TYPE_CHECKING, Optional
 
-# Load environment variables
-load_dotenv('.env.local')
+if TYPE_CHECKING:
+    from supabase import Client
 
-url: str = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
-key: str = os.environ.get("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+ENV_FILE = '.env.local'
 
-if not url or not key:
-    raise ValueError("Missing Supabase environment variables")
+_client: Optional['Client'] = None
+_lock = threading.Lock()
 
-supabase: Client = create_client(url, key)
\ No newline at end of file
+
+def get_supabase() -> 'Client':
+    """Return the shared Supabase client, creating it on first use.
+
+    Reading .env.local and importing the supabase package are deferred to
+    here, so modules that only parse pages or write files never need the
+    environment variables or pay for the import.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            from dotenv import load_dotenv
+            from supabase import create_client
+
+            load_dotenv(ENV_FILE)
+            url = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
+            key = os.environ.get("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+            if not url or not key:
+                raise ValueError("Missing Supabase environment variables")
+            _client = create_client(url, key)
+        return _client
+
+
+def __getattr__(name: str):
+    # Keeps `from supabase_client import supabase` working; the client is
+    # only built when that import actually runs
+    if name == 'supabase':
+        return get_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,107 @@
+import json
+import os
+import random
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), '..', 'sample_company_page.html')
+
+# Company shown in the template page; replaced to generate other companies
+TEMPLATE_NAME = 'オープンハウスグループ'
+TEMPLATE_ID = 'r813010032'
+DATA_TABLE = re.compile(r'<table class="ts-h-company-dataTable">.*?</table>', re.S)
+
+INDUSTRIES = [
+    ('不動産', '住宅／建築設計／建設'),
+    ('ソフトウェア', '情報処理／インターネット関連'),
+    ('食品', '商社（食料品）'),
+    ('銀行', '証券／信託銀行'),
+    ('化粧品', 'トイレタリー／医薬品'),
+    ('自動車', '輸送用機器／自動車部品'),
+]
+LOCATIONS = ['東京', '大阪', '愛知', '福岡', '北海道', '神奈川']
+
+
+@lru_cache(maxsize=1)
+def load_template() -> str:
+    with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def company_id(index: int) -> str:
+    return f"r{100000000 + index}"
+
+
+def synthetic_company(index: int, seed: int = 0) -> Dict:
+    """Deterministic fake company used to fill pages"""
+    rng = random.Random(seed * 1_000_003 + index)
+    industry, sub_industry = rng.choice(INDUSTRIES)
+    return {
+        'id': company_id(index),
+        'name': f"株式会社テスト{index:05d}",
+        'industry': industry,
+        'sub_industry': sub_industry,
+        'location': rng.choice(LOCATIONS),
+    }
+
+
+def company_page(company: Dict) -> str:
+    """Company profile page built from sample_company_page.html"""
+    table = (
+        '<table class="ts-h-company-dataTable">\n<tr>\n'
+        '<th class="ts-h-company-dataTable-cell ts-h-company-dataTable-cell_th">業種</th>\n'
+        '<td class="ts-h-company-dataTable-cell ts-h-company-dataTable-cell_td">\n'
+        f'<div class="ts-h-company-dataTable-main">{company["industry"]}</div>\n'
+        f'<div class="ts-h-company-dataTable-sub">{company["sub_industry"]}</div></td>\n'
+        '</tr>\n<tr>\n'
+        '<th class="ts-h-company-dataTable-cell ts-h-company-dataTable-cell_th">本社</th>\n'
+        '<td class="ts-h-company-dataTable-cell ts-h-company-dataTable-cell_td">\n'
+        f'<div class="ts-h-company-dataTable-main">{company["location"]}</div>\n'
+        '</td>\n</tr>\n</table>'
+    )
+    html = DATA_TABLE.sub(lambda _: table, load_template(), count=1)
+    return html.replace(TEMPLATE_NAME, company['name']).replace(TEMPLATE_ID, company['id'])
+
+
+def listing_page(companies: List[Dict], total: int, page_num: int = 1, details: str = 'none',
+                 year: int = 2026) -> str:
+    """Search result page with one profile link per company and the result counter.
+
+    `details` adds each company's industry and head office to the page:
+    'markup' as a label list in its result card, 'json' as an embedded
+    application/json script, or 'none' (like the live site today).
+    """
+    def card_details(c: Dict) -> str:
+        if details != 'markup':
+            return ''
+        return (f'<dl><dt>業種</dt><dd><span>{c["industry"]}</span><span>{c["sub_industry"]}</span></dd>'
+                f'<dt>本社</dt><dd>{c["location"]}</dd></dl>')
+
+    items = '\n'.join(
+        f'<li class="ts-h-search-cassette"><a href="/{year}/company/{c["id"]}/">{c["name"]}</a>'
+        f'{card_details(c)}<a href="/{year}/company/{c["id"]}/seminars/">説明会</a></li>'
+        for c in companies
+    )
+    if details == 'json':
+        data = {'props': {'companies': [
+            {'companyId': c['id'], 'companyName': c['name'], 'industry': c['industry'] + c['sub_industry'],
+             'headOffice': c['location']}
+            for c in companies
+        ]}}
+        items += ('\n<script id="search-data" type="application/json">'
+                  f'{json.dumps(data, ensure_ascii=False)}</script>')
+    # Reuse the template's head and footer so page weight is realistic
+    template = load_template()
+    head = template.split('<body', 1)[0]
+    footer_start = template.find('<div class="ts-h-l-footer-inner">')
+    footer = template[footer_start:] if footer_start >= 0 else '</body></html>'
+    return (
+        f'{head}<body>\n<div class="ts-h-search-resultCount">該当企業 {total:,}社</div>\n'
+        f'<div class="ts-h-search-page">{page_num}</div>\n<ul>\n{items}\n</ul>\n{footer}'
+    )
+
+
+def listing_companies(page_num: int, per_page: int, total: int, seed: int = 0) -> List[Dict]:
+    start = (page_num - 1) * per_page
+    return [synthetic_company(index, seed) for index in range(start, min(start + per_page, total))]
@@ -0,0 +1,234 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_QUEUE_PATH = 'rikunabi_queue.db'
+DEFAULT_LEASE_SECONDS = 120.0
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_RETRY_DELAY = 5.0  # seconds, doubled after every failed attempt
+
+# Company units sort ahead of listing pages so scraped rows flow steadily
+PRIORITY = {'company': 0, 'page': 1}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    payload TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    updated_at REAL,
+    UNIQUE (kind, year, key)
+);
+CREATE INDEX IF NOT EXISTS idx_units_ready ON units(status, priority, available_at);
+CREATE TABLE IF NOT EXISTS budget (
+    host TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class WorkQueue:
+    """SQLite queue of crawl work units shared by a coordinator and many workers.
+
+    Units are listing pages or company detail pages of one graduation year,
+    unique on (kind, year, key) so re-adding a unit is a no-op. Workers lease
+    units for `lease_seconds` and renew the lease with heartbeats; a unit
+    whose lease expires (its worker died) is handed to the next worker. Each
+    lease counts as an attempt and failed units are retried with exponential
+    backoff until max_attempts, after which they are marked failed.
+
+    The database also holds the per-host token buckets that make up the
+    global politeness budget (see rate_limiter.SharedRateLimiter). Every
+    process opens the same file.
+
+    By default the file uses WAL mode, which relies on shared memory and so
+    only works for workers on one host. With `shared=True` it uses a rollback
+    journal instead, so workers on several machines can open it over a
+    network filesystem, provided that filesystem implements POSIX file
+    locks correctly (NFS often does not; keep the queue on one host then).
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, retry_delay: float = DEFAULT_RETRY_DELAY,
+                 shared: bool = False):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lock = threading.Lock()
+        # Autocommit mode so transactions can be opened with BEGIN IMMEDIATE,
+        # which takes the write lock up front and keeps leases atomic
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        if shared:
+            self.conn.execute('PRAGMA journal_mode=DELETE')
+            self.conn.execute('PRAGMA synchronous=FULL')
+        else:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        with self.lock:
+            return self.conn.execute(sql, tuple(params)).fetchall()
+
+    def _transaction(self, fn):
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = fn(self.conn)
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            return result
+
+    def add(self, kind: str, year: int, items: Iterable[Dict], key: str) -> int:
+        """Queue units built from `items`, keyed on item[key]; returns how many were new"""
+        now = time.time()
+        rows = [(kind, year, str(item[key]), PRIORITY[kind], json.dumps(item, ensure_ascii=False), now)
+                for item in items]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO units (kind, year, key, priority, payload, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    def add_pages(self, year: int, start_page: int, end_page: int, page_size: Optional[int] = None,
+                  grown: bool = False) -> int:
+        # `grown` pages lie past the listing's count; an empty one ends the listing
+        pages = ({'page': page, 'page_size': page_size, 'grown': grown}
+                 for page in range(start_page, end_page + 1))
+        return self.add('page', year, pages, 'page')
+
+    def add_companies(self, year: int, companies: Iterable[Dict]) -> int:
+        return self.add('company', year, companies, 'source_url')
+
+    def lease(self, worker: str, limit: int = 1) -> List[Dict]:
+        """Claim up to `limit` ready units for `worker`"""
+        def claim(conn):
+            now = time.time()
+            rows = conn.execute(
+                "SELECT id, kind, year, payload FROM units "
+                "WHERE (status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY priority, id LIMIT ?",
+                (now, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE units SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                [(worker, now + self.lease_seconds, now, row[0]) for row in rows],
+            )
+            return [{'id': unit_id, 'kind': kind, 'year': year, 'item': json.loads(payload)}
+                    for unit_id, kind, year, payload in rows]
+        return self._transaction(claim)
+
+    def heartbeat(self, worker: str) -> int:
+        """Extend every lease held by `worker`; returns how many are still held"""
+        def renew(conn):
+            now = time.time()
+            return conn.execute(
+                "UPDATE units SET lease_expires = ? WHERE status = 'leased' AND lease_owner = ?",
+                (now + self.lease_seconds, worker),
+            ).rowcount
+        return self._transaction(renew)
+
+    def complete(self, worker: str, unit_ids: Iterable[int]) -> int:
+        """Mark units done; units whose lease passed to another worker are left alone"""
+        def finish(conn):
+            now = time.time()
+            return sum(conn.execute(
+                "UPDATE units SET status = 'done', error = NULL, lease_owner = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (now, unit_id, worker),
+            ).rowcount for unit_id in unit_ids)
+        return self._transaction(finish)
+
+    def fail(self, worker: str, unit_id: int, error: str) -> Optional[float]:
+        """Release a failed unit; returns the retry delay, or None once attempts are exhausted"""
+        def release(conn):
+            row = conn.execute(
+                "SELECT attempts FROM units WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (unit_id, worker),
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if row[0] >= self.max_attempts:
+                conn.execute(
+                    "UPDATE units SET status = 'failed', error = ?, lease_owner = NULL, updated_at = ? "
+                    "WHERE id = ?",
+                    (error, now, unit_id),
+                )
+                return None
+            delay = self.retry_delay * 2 ** (row[0] - 1)
+            conn.execute(
+                "UPDATE units SET status = 'pending', error = ?, lease_owner = NULL, available_at = ?, "
+                "updated_at = ? WHERE id = ?",
+                (error, now + delay, now, unit_id),
+            )
+            return delay
+        return self._transaction(release)
+
+    def last_page(self, year: int) -> int:
+        rows = self._query("SELECT MAX(CAST(key AS INTEGER)) FROM units WHERE kind = 'page' AND year = ?",
+                           (year,))
+        return rows[0][0] or 0
+
+    def retry_failed(self) -> int:
+        def retry(conn):
+            return conn.execute(
+                # Older queues also skipped every page after an empty one
+                "UPDATE units SET status = 'pending', attempts = 0, available_at = 0 "
+                "WHERE status = 'failed' OR (status = 'skipped' AND kind = 'page')"
+            ).rowcount
+        return self._transaction(retry)
+
+    def outstanding(self) -> int:
+        """Units that are pending or leased, i.e. not yet finished"""
+        return self._query("SELECT COUNT(*) FROM units WHERE status IN ('pending', 'leased')")[0][0]
+
+    def take_token(self, host: str, rate: float, burst: float) -> float:
+        """Take one request token for `host` from the shared bucket; returns seconds to wait first"""
+        def take(conn):
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated_at FROM budget WHERE host = ?", (host,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            conn.execute(
+                "INSERT INTO budget (host, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(host) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (host, tokens, now),
+            )
+            return wait
+        return self._transaction(take)
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        rows = self._query("SELECT year || ' ' || kind, status, COUNT(*) FROM units GROUP BY year, kind, status")
+        summary: Dict[str, Dict[str, int]] = {}
+        for group, status, count in rows:
+            summary.setdefault(group, {})[status] = count
+        return summary
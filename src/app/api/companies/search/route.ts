@@ -1,20 +1,69 @@
 import { createClient } from '@/lib/supabase'
 import { NextRequest, NextResponse } from 'next/server'
 
+// scripts/search_index.py serve のURL（例: http://127.0.0.1:8766）。未設定ならSupabaseのみ
+const SEARCH_INDEX_URL = process.env.COMPANY_SEARCH_INDEX_URL
+const SEARCH_INDEX_TIMEOUT_MS = 300
+
+type CompanyResult = {
+  id: string
+  name: string
+  description?: string | null
+  location?: string | null
+  employee_count?: string | null
+}
+
+// ローカル検索インデックスに問い合わせる。使えない場合はnullを返しSupabaseにフォールバックする
+async function searchLocalIndex(query: string, limit: number, industryId: string | null): Promise<CompanyResult[] | null> {
+  if (!SEARCH_INDEX_URL) {
+    return null
+  }
+
+  const params = new URLSearchParams({ q: query, limit: String(limit) })
+  if (industryId) {
+    params.set('industry_id', industryId)
+  }
+
+  try {
+    const response = await fetch(`${SEARCH_INDEX_URL}/search?${params}`, {
+      signal: AbortSignal.timeout(SEARCH_INDEX_TIMEOUT_MS),
+      cache: 'no-store',
+    })
+    if (!response.ok) {
+      return null
+    }
+    const companies: CompanyResult[] = await response.json()
+    // エクスポートファイルから作ったインデックスにはidがないため、その場合はSupabaseを使う
+    if (companies.some((company) => !company.id)) {
+      return null
+    }
+    return companies
+  } catch (error) {
+    console.error('Search index error:', error)
+    return null
+  }
+}
 
 export async function GET(request: NextRequest) {
-  const supabase = createClient()
   const { searchParams } = new URL(request.url)
   const query = searchParams.get('q')
-  const limit = parseInt(searchParams.get('limit') || '10')
+  const industryId = searchParams.get('industry_id')
+  const limit = parseInt(searchParams.get('limit') || '10') || 10
 
   if (!query || query.trim().length === 0) {
     return NextResponse.json([])
   }
 
+  const localResults = await searchLocalIndex(query, limit, industryId)
+  if (localResults) {
+    return NextResponse.json(localResults)
+  }
+
+  const supabase = createClient()
+
   try {
     // Supabaseデータベースから企業を検索
-    const { data: companies, error } = await supabase
+    let search = supabase
       .from('companies')
       .select(`
         id,
@@ -24,6 +73,13 @@ export async function GET(request: NextRequest) {
         employee_count
       `)
       .or(`name.ilike.%${query}%,description.ilike.%${query}%`)
+
+    // 業界指定はindustry_idのインデックスで絞り込む
+    if (industryId) {
+      search = search.eq('industry_id', industryId)
+    }
+
+    const { data: companies, error } = await search
       .order('name')
       .limit(limit)
 
@@ -38,4 +94,4 @@ export async function GET(request: NextRequest) {
     console.error('Search error:', error)
     return NextResponse.json([])
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,10 @@
+-- Track when each company row was last refreshed by the scraper
+ALTER TABLE public.companies ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_companies_updated_at ON public.companies(updated_at);
+
+DROP TRIGGER IF EXISTS set_updated_at_companies ON public.companies;
+CREATE TRIGGER set_updated_at_companies
+    BEFORE UPDATE ON public.companies
+    FOR EACH ROW
+    EXECUTE FUNCTION public.handle_updated_at();
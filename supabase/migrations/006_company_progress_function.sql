@@ -0,0 +1,20 @@
+-- Aggregate scraping progress in a single round trip for scripts/check_progress.py
+CREATE OR REPLACE FUNCTION public.company_progress()
+RETURNS TABLE (
+    total BIGINT,
+    with_industry BIGINT,
+    with_location BIGINT,
+    with_industry_text BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        COUNT(*),
+        COUNT(description),
+        COUNT(location),
+        COUNT(industry_text)
+    FROM public.companies;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.company_progress() TO anon, authenticated, service_role;
@@ -0,0 +1,2 @@
+-- Hash of the scraped fields, so refreshes can skip rows whose content is unchanged
+ALTER TABLE public.companies ADD COLUMN IF NOT EXISTS content_hash TEXT;